@@ -0,0 +1,129 @@
+"""Headless batch solver for nonogram files.
+
+Solves all given .nob/.nos files and all such files within the given directories with NonogramAssist.NonoAssist
+and writes one JSON line per puzzle to stdout. No pygame window and no Qt application is started.
+Each puzzle is read and solved by a worker process, so reading and solving of different puzzles overlap.
+
+Example:
+   python NonoBatchSolve.py Nono_Examples -j 8 > results.jsonl
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import NonoFile
+import NonoInstrument
+import NonogramAssist as nAss
+
+NONO_EXTENSIONS = ('.nob', '.nos')  #: file extensions of nonogram files
+
+
+def IterateNonogramFiles (paths: list, recursive = True):
+   """Yields the path of each nonogram file. Paths may be files or directories. The files of a directory are sorted"""
+   for path in paths:
+      if not os.path.isdir (path):
+         yield path
+         continue
+      for dirPath, dirNames, fileNames in os.walk (path):
+         dirNames.sort ()
+         if not recursive: dirNames.clear ()
+         for fileName in sorted (fileNames):
+            if fileName.lower ().endswith (NONO_EXTENSIONS): yield os.path.join (dirPath, fileName)
+
+
+def _JsonLog2 (value: float):
+   # -inf (no valid permutation) is not a valid JSON number
+   return None if math.isinf (value) else round (value, 3)
+
+
+def SolvePuzzle (fileName: str, useProbing = True, checkUnique = False, traceDir = None, noWorkers = 0):
+   """Reads and solves one nonogram file. If traceDir is given, the events of the solver are written to the file
+   <traceDir>/<name of the nonogram file>.trace.jsonl (see NonoInstrument.clJsonLinesSink). With noWorkers > 1 the
+   line solves of a sweep are done by a pool of noWorkers processes.
+
+      Returns:
+         dict: The result of the puzzle with the keys
+               file, status ('solved', 'stuck', 'contradiction' (the clues have no solution) or 'error'), rows, cols, cellsSolved, cellsTotal,
+               readTime, solveTime (sec), lineSolves, log2Permutations (of all rows before solving),
+               log2RemainingPermutations (of all rows after solving), unique (only with checkUnique) and error
+   """
+   result = {'file': fileName}
+   startTime = time.perf_counter ()
+   try:
+      # invalid files are rejected by the checks of the parser, before any solver work
+      rowBlocks, colBlocks, _ = NonoFile.ParseNonogramFile (fileName)
+   except (OSError, NonoFile.clNonoFileError) as e:
+      result.update (status = 'error', error = f'invalid nonogram file: {e}')
+      return result
+   result ['readTime'] = round (time.perf_counter () - startTime, 6)
+
+   result.update (rows = len (rowBlocks), cols = len (colBlocks), cellsTotal = len (rowBlocks) * len (colBlocks))
+   traceSink = assist = None
+   try:
+      startTime = time.perf_counter ()
+      assist = nAss.NonoAssist (rowBlocks, colBlocks, useProbing = useProbing, noWorkers = noWorkers)
+      if traceDir:
+         traceSink = assist.instrument.AddSink (
+            NonoInstrument.clJsonLinesSink (os.path.join (traceDir, os.path.basename (fileName) + '.trace.jsonl')))
+      result ['log2Permutations'] = _JsonLog2 (assist.CalculateNumberPermutationsOfNonogram (logScale = True))
+      isSolved, solvedFields = False, {}
+      for isSolved, solvedFields in assist.NonogramSolver (): pass
+      result ['solveTime'] = round (time.perf_counter () - startTime, 6)
+      status = 'contradiction' if assist.isContradictory else 'solved' if isSolved else 'stuck'
+      result.update (status = status, cellsSolved = len (solvedFields),
+                     lineSolves = assist.noLineSolves)
+      result ['log2RemainingPermutations'] = _JsonLog2 (assist.CalculateNumberPermutationsOfNonogram (True, solvedFields, logScale = True))
+      if checkUnique: result ['unique'] = len (assist.EnumerateSolutions (2, solvedFields)) == 1
+   except Exception as e:
+      result.update (status = 'error', error = f'{type (e).__name__}: {e}')
+   finally:
+      if traceSink: traceSink.Close ()
+      if assist: assist.Close ()
+   return result
+
+
+def _SolvePuzzleTask (task):
+   return SolvePuzzle (*task)
+
+
+def Main (argv = None):
+   parser = argparse.ArgumentParser (description = 'Solves nonogram files without GUI and writes one JSON line per puzzle')
+   parser.add_argument ('paths', nargs = '+', help = '.nob/.nos files or directories containing them')
+   parser.add_argument ('-j', '--jobs', type = int, default = 0, help = 'number of worker processes (default: number of CPUs)')
+   parser.add_argument ('--workers', type = int, default = 0,
+                        help = 'number of processes for the line solves of one puzzle. If > 1, the puzzles are solved one after another')
+   parser.add_argument ('--chunksize', type = int, default = 4, help = 'number of puzzles sent to a worker at once')
+   parser.add_argument ('--no-recursive', action = 'store_true', help = 'do not search sub directories')
+   parser.add_argument ('--no-probing', action = 'store_true', help = 'only line solving, no probing of fields')
+   parser.add_argument ('--check-unique', action = 'store_true', help = 'check if the solution is unique')
+   parser.add_argument ('--trace', metavar = 'DIR', help = 'write the events of the solver to one JSON lines file per puzzle in DIR')
+   args = parser.parse_args (argv)
+
+   if args.trace: os.makedirs (args.trace, exist_ok = True)
+   tasks = ((fileName, not args.no_probing, args.check_unique, args.trace, args.workers)
+               for fileName in IterateNonogramFiles (args.paths, not args.no_recursive))
+   noErrors = 0
+
+   def WriteResults (results):
+      nonlocal noErrors
+      for result in results:
+         noErrors += result ['status'] == 'error'
+         sys.stdout.write (json.dumps (result) + '\n')
+         sys.stdout.flush ()
+
+   if args.workers > 1:
+      # the worker processes of a pool cannot start a pool of their own
+      WriteResults (map (_SolvePuzzleTask, tasks))
+   else:
+      with multiprocessing.Pool (args.jobs or os.cpu_count () or 1) as pool:
+         # the results are written in the order the puzzles are finished
+         WriteResults (pool.imap_unordered (_SolvePuzzleTask, tasks, args.chunksize))
+   return 1 if noErrors else 0
+
+
+if __name__ == "__main__":
+   sys.exit (Main ())
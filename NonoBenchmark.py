@@ -0,0 +1,201 @@
+"""Benchmark of the nonogram solver with regression check.
+
+Runs the examples of Nono_Examples and generated large nonograms through the solver stages FillObviousFields,
+FillFieldsWithPresets (one sweep over all rows and one over all columns) and the full NonogramSolver. For each
+puzzle and stage the wall time (best of --repeat runs), the number of line solves, the number of permutations
+run through by the stepper line solvers and the peak memory (tracemalloc) are recorded.
+First the fields found by the NonogramSolver are checked against the clues, with the STEPPER or BITSTEPPER line
+solver they are also compared with the DP line solver. A wrong solve is reported and its results are not saved as
+baseline.
+
+Example:
+   python NonoBenchmark.py --save nono_benchmark.json          # record a baseline
+   python NonoBenchmark.py --baseline nono_benchmark.json      # exit code 1, if a stage regressed
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from NonoBlock import ClBlock
+import NonoBoard
+import NonoCompletion
+import NonoFile
+import NonogramAssist as nAss
+
+EXAMPLES_DIR = os.path.join (os.path.dirname (os.path.abspath (__file__)), 'Nono_Examples')
+EXAMPLES = ('Bird', 'France', 'Lighthouse', 'SittingMan', 'diver', 'surfer', 'dive')
+GENERATED = ((50, 50, 0.65, 1), (100, 100, 0.65, 2), (150, 100, 0.7, 3))
+"""(rows, cols, density, seed) of the generated nonograms"""
+
+STAGES = ('FillObviousFields', 'FillFieldsWithPresets', 'NonogramSolver')
+METRICS = ('time', 'lineSolves', 'permutations', 'peakMemory')  #: all metrics are checked for regression
+
+
+def _BlocksOfLine (line):
+   lengths, n = [], 0
+   for isFilled in list (line) + [False]:
+      if isFilled: n += 1
+      elif n:
+         lengths.append (n)
+         n = 0
+   return [ClBlock (L) for L in lengths] or [ClBlock (0)]
+
+
+def GenerateNonogram (noRows: int, noCols: int, density: float, seed: int):
+   """Returns (rowBlocks, colBlocks) of a random image. Each field is filled with the probability density"""
+   rnd = random.Random (seed)
+   image = [[rnd.random () < density for _ in range (noCols)] for _ in range (noRows)]
+   rowBlocks = [_BlocksOfLine (line) for line in image]
+   colBlocks = [_BlocksOfLine (line) for line in zip (*image)]
+   return rowBlocks, colBlocks
+
+
+def LoadPuzzles ():
+   """Returns a list of (name, rowBlocks, colBlocks)"""
+   puzzles = []
+   for name in EXAMPLES:
+      ok, rowBlocks, colBlocks, _ = NonoFile.ReadNonogramFromFile (os.path.join (EXAMPLES_DIR, name + '.nob'))
+      if ok: puzzles.append ((name, rowBlocks, colBlocks))
+   for noRows, noCols, density, seed in GENERATED:
+      puzzles.append ((f'random{noRows}x{noCols}_{seed}', *GenerateNonogram (noRows, noCols, density, seed)))
+   return puzzles
+
+
+def _RunStage (stage: str, assist: nAss.NonoAssist):
+   if stage == 'FillObviousFields':
+      assist.FillObviousFields ()
+   elif stage == 'FillFieldsWithPresets':
+      procField = assist.FillObviousFields ()
+      result, _ = assist.FillFieldsWithPresets (procField)
+      procField.update (result)
+      assist.FillFieldsWithPresets (procField, False)
+   else:
+      for _ in assist.NonogramSolver (): pass
+
+
+def MeasureStage (stage: str, rowBlocks: list, colBlocks: list, lineSolver, repeat: int, noWorkers = 0):
+   """Returns a dict of all METRICS of a stage. Each run uses a new NonoAssist, so no line is taken from the cache
+   of a previous run. The peak memory is measured in a separate run, because tracemalloc slows down the run.
+   With noWorkers > 1 the time includes the start of the process pool, the peak memory is only the one of the
+   calling process.
+   """
+   bestTime = None
+   for _ in range (repeat):
+      assist = nAss.NonoAssist (rowBlocks, colBlocks, lineSolver = lineSolver, noWorkers = noWorkers)
+      startTime = time.perf_counter ()
+      _RunStage (stage, assist)
+      runTime = time.perf_counter () - startTime
+      assist.Close ()
+      bestTime = runTime if bestTime is None else min (bestTime, runTime)
+
+   assist = nAss.NonoAssist (rowBlocks, colBlocks, lineSolver = lineSolver, noWorkers = noWorkers)
+   tracemalloc.start ()
+   _RunStage (stage, assist)
+   _, peakMemory = tracemalloc.get_traced_memory ()
+   tracemalloc.stop ()
+   assist.Close ()
+   return {'time': bestTime, 'lineSolves': assist.noLineSolves, 'permutations': assist.noPermutations, 'peakMemory': peakMemory}
+
+
+def RunBenchmark (lineSolver = nAss.EnLineSolver.DP, repeat = 3, puzzleFilter = None, log = None, noWorkers = 0):
+   """Returns a dict {puzzle: {stage: {metric: value}}}"""
+   results = {}
+   for name, rowBlocks, colBlocks in LoadPuzzles ():
+      if puzzleFilter and puzzleFilter not in name: continue
+      results [name] = {}
+      for stage in STAGES:
+         results [name][stage] = MeasureStage (stage, rowBlocks, colBlocks, lineSolver, repeat, noWorkers)
+         if log: log (f'{name:<22} {stage:<22} ' + ' '.join (f'{m}={v:.4g}' for m, v in results [name][stage].items ()))
+   return results
+
+
+def FindWrongSolves (lineSolver, puzzleFilter = None):
+   """Returns the names of the puzzles, where the NonogramSolver with lineSolver finds fields which contradict the
+   clues (a row or column can not form its clue any more). With the stepper line solvers also the puzzles, where
+   other fields are found than with the DP line solver.
+   """
+   def Solve (rowBlocks, colBlocks, lineSolver):
+      for _, solvedFields in nAss.NonoAssist (rowBlocks, colBlocks, lineSolver = lineSolver).NonogramSolver (): pass
+      return solvedFields
+
+   def ContradictsClues (rowBlocks, colBlocks, solvedFields):
+      board = NonoBoard.clNonoBoard (len (rowBlocks), len (colBlocks))
+      board.SetFields (solvedFields, ClBlock.NORMAL)
+      return NonoCompletion.clCompletion (board, rowBlocks, colBlocks).noWrong > 0
+
+   wrongSolves = []
+   for name, rowBlocks, colBlocks in LoadPuzzles ():
+      if puzzleFilter and puzzleFilter not in name: continue
+      solvedFields = Solve (rowBlocks, colBlocks, lineSolver)
+      if ContradictsClues (rowBlocks, colBlocks, solvedFields) or \
+         (lineSolver != nAss.EnLineSolver.DP and solvedFields != Solve (rowBlocks, colBlocks, nAss.EnLineSolver.DP)):
+         wrongSolves.append (name)
+   return wrongSolves
+
+
+def FindRegressions (results: dict, baseline: dict, tolerance: float, minTime: float):
+   """Returns a list of text lines, one for each metric which is worse than the baseline by more than tolerance
+   (relative). Time differences below minTime (sec) are ignored, they are just noise.
+   """
+   regressions = []
+   for name, stages in results.items ():
+      for stage, metrics in stages.items ():
+         base = baseline.get (name, {}).get (stage)
+         if base is None: continue
+         for metric in METRICS:
+            value, baseValue = metrics [metric], base.get (metric)
+            if baseValue is None: continue
+            limit = baseValue * (1 + tolerance)
+            if metric == 'time': limit = max (limit, baseValue + minTime)
+            if value > limit:
+               regressions.append (f'{name} {stage} {metric}: {value:.4g} > {baseValue:.4g} (limit {limit:.4g})')
+   return regressions
+
+
+def Main (argv = None):
+   parser = argparse.ArgumentParser (description = 'Benchmark of the nonogram solver stages')
+   parser.add_argument ('--save', metavar = 'FILE', help = 'save the results as baseline to FILE')
+   parser.add_argument ('--baseline', metavar = 'FILE', help = 'compare the results with the baseline in FILE')
+   parser.add_argument ('--tolerance', type = float, default = 0.25, help = 'allowed relative regression (default 0.25)')
+   parser.add_argument ('--min-time', type = float, default = 0.005, help = 'time regressions below this (sec) are ignored')
+   parser.add_argument ('--repeat', type = int, default = 3, help = 'number of runs per stage, the best time is taken')
+   parser.add_argument ('--line-solver', choices = [e.name for e in nAss.EnLineSolver], default = 'DP')
+   parser.add_argument ('--puzzle', help = 'only puzzles whose name contains this text')
+   parser.add_argument ('--workers', type = int, default = 0,
+                        help = 'number of processes for the line solves of a sweep (DP line solver only, default: sequential)')
+   args = parser.parse_args (argv)
+
+   lineSolver = nAss.EnLineSolver [args.line_solver]
+   # the measurement of a wrong solve is meaningless
+   wrongSolves = FindWrongSolves (lineSolver, args.puzzle)
+   for name in wrongSolves: print ('WRONG SOLVE', name, 'contradicts the clues or differs from the DP line solver')
+   if wrongSolves: return 1
+   results = RunBenchmark (lineSolver, args.repeat, args.puzzle, print, args.workers)
+
+   if args.save:
+      with open (args.save, 'w') as f:
+         json.dump ({'lineSolver': lineSolver.name, 'workers': args.workers, 'python': platform.python_version (), 'results': results}, f, indent = 1)
+
+   if args.baseline:
+      with open (args.baseline) as f:
+         baseline = json.load (f)
+      if baseline.get ('lineSolver', lineSolver.name) != lineSolver.name:
+         print (f'Baseline was recorded with line solver {baseline ["lineSolver"]}')
+         return 2
+      if baseline.get ('workers', 0) != args.workers:
+         print (f'Baseline was recorded with {baseline.get ("workers", 0)} workers')
+         return 2
+      regressions = FindRegressions (results, baseline ['results'], args.tolerance, args.min_time)
+      for text in regressions: print ('REGRESSION', text)
+      if regressions: return 1
+      print ('No regressions')
+   return 0
+
+
+if __name__ == "__main__":
+   sys.exit (Main ())
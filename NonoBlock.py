@@ -1,5 +1,3 @@
-import pygame
-
 class ClBlock:
    FILLED = 'F' 
    CROSS = 'C'
@@ -7,11 +5,14 @@ class ClBlock:
    NORMAL = 'N'
    TRIAL = 'T'
 
-   def __init__ (self, length, rectOnScreen = pygame.Rect((0,0), (10,10)), *, state = UNKNOWN, mode = NORMAL):
+   def __init__ (self, length, rectOnScreen = None, *, state = UNKNOWN, mode = NORMAL):
       self.length = length
+      # the rectangle of the rendered block length is attached by the game (a pygame.Rect). The solver does not need it
       self.rectOnScreen = rectOnScreen
       self.state = state
       self.mode = mode
+      # True, if the block is provably placed on the board (set by NonoCompletion.clClueMatcher). Not saved
+      self.isPlaced = False
 
 
    def set_state (self, state):
@@ -36,4 +37,4 @@ class ClBlock:
    mode = property(fget=get_mode, fset=set_mode)  
 
    def WasClicked (self, pos):
-      return self.rectOnScreen.collidepoint (pos)    
+      return self.rectOnScreen is not None and self.rectOnScreen.collidepoint (pos)    
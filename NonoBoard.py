@@ -0,0 +1,175 @@
+import numpy as np
+
+from NonoBlock import ClBlock
+from NonoStepper import SetFromMask
+
+
+def MaskFromBools (boolArray) -> int:
+   """Converts a 1D bool array into an int bit mask. Bit i is set, if boolArray [i] is True"""
+   return int.from_bytes (np.packbits (boolArray, bitorder='little').tobytes (), 'little')
+
+
+#################################################################################
+# definition of class clNonoBoard  #ff00ff
+#################################################################################
+class clNonoBoard:
+   """The board of the nonogram game. State and mode of all fields are held in two uint8 NumPy arrays (rows x cols).
+
+   The states and modes are stored as codes. The index of a state (mode) in STATES (MODES) is its code, so the code of
+   UNKNOWN and NORMAL is 0. Positions are given as (col, row), (0,0) is the upper left field.
+   The pixel positions of the fields are not stored, they are derived from the position by the game.
+   """
+   STATES = (ClBlock.UNKNOWN, ClBlock.FILLED, ClBlock.CROSS)  #: state of a code
+   MODES = (ClBlock.NORMAL, ClBlock.TRIAL)                    #: mode of a code
+   STATE_CODE = {s: i for i, s in enumerate (STATES)}         #: code of a state
+   MODE_CODE = {m: i for i, m in enumerate (MODES)}           #: code of a mode
+   UNKNOWN, FILLED, CROSS = range (3)
+   NORMAL, TRIAL = range (2)
+
+   _STATE_BYTES = np.array ([s.encode () for s in STATES], dtype='S1')
+   _MODE_BYTES = np.array ([m.encode () for m in MODES], dtype='S1')
+
+   def __init__(self, noRows: int, noCols: int):
+      self.noRows = noRows  #: number of rows of the nonogram
+      self.noCols = noCols  #: number of columns of the nonogram
+      self.state = np.zeros ((noRows, noCols), dtype=np.uint8)  #: state [row, col] is the state code of the field
+      self.mode = np.zeros ((noRows, noCols), dtype=np.uint8)   #: mode [row, col] is the mode code of the field
+      self.observers = []  #: callables observer (cols, rows), called with the positions of the fields after each change
+
+   @classmethod
+   def FromProcessedFields (cls, noRows: int, noCols: int, procField: dict):
+      """Creates the board from a dict of dicts {(col, row): {'state': state, 'mode': mode, ...}}"""
+      board = cls (noRows, noCols)
+      for pos, attr in procField.items ():
+         board.Set (pos, attr ['state'], attr ['mode'])
+      return board
+
+   @classmethod
+   def FromCodes (cls, stateCodes, modeCodes):
+      """Creates the board from the uint8 arrays (rows x cols) of the state and mode codes. The arrays are taken over"""
+      board = cls (*stateCodes.shape)
+      board.state = stateCodes
+      board.mode = modeCodes
+      return board
+
+   #  single fields  ###############################################################
+   def Get (self, pos):
+      """Returns (state, mode) of the field at pos = (col, row)"""
+      col, row = pos
+      return self.STATES [self.state [row, col]], self.MODES [self.mode [row, col]]
+
+   def Set (self, pos, state, mode):
+      col, row = pos
+      self.state [row, col] = self.STATE_CODE [state]
+      self.mode [row, col] = self.MODE_CODE [mode]
+      self._Notify ((col,), (row,))
+
+   #  many fields at once  ##########################################################
+   def GetCodes (self, cols, rows):
+      """Returns the arrays (stateCodes, modeCodes) of the fields given by the arrays cols and rows"""
+      return self.state [rows, cols], self.mode [rows, cols]
+
+   def SetCodes (self, cols, rows, stateCodes, modeCodes):
+      self.state [rows, cols] = stateCodes
+      self.mode [rows, cols] = modeCodes
+      self._Notify (cols, rows)
+
+   def _Notify (self, cols, rows):
+      for observer in self.observers:
+         observer (cols, rows)
+
+   def SetFields (self, fields: dict, mode):
+      """Sets all fields of a dict {(col, row): state} to the given mode.
+      Returns the arrays (cols, rows, oldStateCodes, oldModeCodes) to undo the change
+      """
+      cols = np.fromiter ((col for col, _ in fields), dtype=np.intp, count=len (fields))
+      rows = np.fromiter ((row for _, row in fields), dtype=np.intp, count=len (fields))
+      stateCodes = np.fromiter ((self.STATE_CODE [s] for s in fields.values ()), dtype=np.uint8, count=len (fields))
+      oldStates, oldModes = self.GetCodes (cols, rows)
+      self.SetCodes (cols, rows, stateCodes, self.MODE_CODE [mode])
+      return cols, rows, oldStates, oldModes
+
+   #  queries  #####################################################################
+   def KnownPositions (self):
+      """Returns the arrays (cols, rows) of all fields which are not UNKNOWN"""
+      rows, cols = np.nonzero (self.state)
+      return cols, rows
+
+   def TrialPositions (self):
+      """Returns the arrays (cols, rows) of all fields in TRIAL mode"""
+      rows, cols = np.nonzero (self.mode == self.TRIAL)
+      return cols, rows
+
+   def HasTrial (self):
+      return bool ((self.mode == self.TRIAL).any ())
+
+   def FilledInRow (self, row):
+      """Returns the array of the column indices of all filled fields in the row"""
+      return np.flatnonzero (self.state [row] == self.FILLED)
+
+   def FilledInCol (self, col):
+      """Returns the array of the row indices of all filled fields in the column"""
+      return np.flatnonzero (self.state [:, col] == self.FILLED)
+
+   def CountUnknown (self):
+      return int (np.count_nonzero (self.state == self.UNKNOWN))
+
+   #  change tracking for drawing  #################################################
+   def Snapshot (self):
+      """Returns a copy (stateCodes, modeCodes) of the board to find the fields changed later by ChangedSince"""
+      return self.state.copy (), self.mode.copy ()
+
+   def ChangedSince (self, snapshot):
+      """Returns the arrays (cols, rows) of the fields, whose state or mode differs from the snapshot. 
+      None, if the snapshot does not fit to the board size
+      """
+      state, mode = snapshot
+      if state.shape != self.state.shape: return None
+      rows, cols = np.nonzero ((state != self.state) | (mode != self.mode))
+      return cols, rows
+
+   #  trial mode  ##################################################################
+   def _ChangeTrialFields (self, toUnknown: bool):
+      cols, rows = self.TrialPositions ()
+      if not len (cols): return None
+      oldStates, oldModes = self.GetCodes (cols, rows)
+      if toUnknown: self.state [rows, cols] = self.UNKNOWN
+      self.mode [rows, cols] = self.NORMAL
+      self._Notify (cols, rows)
+      return cols, rows, oldStates, oldModes
+
+   def RedToWhite (self):
+      """Removes all TRIAL fields. Returns (cols, rows, oldStateCodes, oldModeCodes) to undo the change or None"""
+      return self._ChangeTrialFields (True)
+
+   def RedToBlack (self):
+      """Sets all TRIAL fields to NORMAL. Returns (cols, rows, oldStateCodes, oldModeCodes) to undo the change or None"""
+      return self._ChangeTrialFields (False)
+
+   #  views for the solver (see NonoBoardState.clBoardState)  #######################
+   def LineMasks (self, useRows: bool, i: int):
+      """Returns the masks (filledMask, crossMask) of row i (useRows) or column i"""
+      line = self.state [i] if useRows else self.state [:, i]
+      return MaskFromBools (line == self.FILLED), MaskFromBools (line == self.CROSS)
+
+   def LineSets (self, useRows: bool, i: int):
+      """Returns the sets (crossIndis, filledIndis) of the crossed and filled indices of row i (useRows) or column i"""
+      filledMask, crossMask = self.LineMasks (useRows, i)
+      return SetFromMask (crossMask), SetFromMask (filledMask)
+
+   def LineLength (self, useRows: bool):
+      return self.noCols if useRows else self.noRows
+
+   def NoLines (self, useRows: bool):
+      return self.noRows if useRows else self.noCols
+
+   #  file i/o  ####################################################################
+   def RowText (self, row):
+      """Returns the state/mode characters of all fields of the row as used in the nonogram file"""
+      text = np.empty (2 * self.noCols, dtype='S1')
+      text [0::2] = self._STATE_BYTES [self.state [row]]
+      text [1::2] = self._MODE_BYTES [self.mode [row]]
+      return text.tobytes ().decode ()
+#################################################################################
+# end of class clNonoBoard
+#################################################################################
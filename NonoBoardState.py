@@ -0,0 +1,99 @@
+from NonoBlock import ClBlock
+from NonoStepper import SetFromMask
+
+
+#################################################################################
+# definition of class clBoardState  #ff00ff
+#################################################################################
+class clBoardState:
+   """Grid backed state of all fields of a nonogram with a view for each row and each column.
+
+   For each row and column the filled and the crossed fields are held as bit masks, which are kept up to date
+   whenever a field is set. So the known fields of a line are available in O(line length) without running
+   through all known fields of the nonogram.
+   """
+
+   def __init__(self, noRows: int, noCols: int):
+      self.noRows = noRows    #: number of rows of the nonogram
+      self.noCols = noCols    #: number of columns of the nonogram
+      self.grid = [[ClBlock.UNKNOWN] * noCols for _ in range (noRows)]
+      """grid [row][col] is the state of the field regarding constants of NonoBlock.ClBlock FILLED CROSS UNKNOWN"""
+      self.rowFilled = [0] * noRows  #: rowFilled [row] is the mask of the filled fields in the row. Bit i is column i
+      self.rowCross = [0] * noRows   #: rowCross [row] is the mask of the crossed fields in the row. Bit i is column i
+      self.colFilled = [0] * noCols  #: colFilled [col] is the mask of the filled fields in the column. Bit i is row i
+      self.colCross = [0] * noCols   #: colCross [col] is the mask of the crossed fields in the column. Bit i is row i
+      self.knownFields = {}
+      """Dict {(col, row): state} of all fields which are not UNKNOWN. Corresponds to the dict of processed fields
+      of Nonogram_Game.ReadNonogramFromFile, without 'pos' and without 'mode'
+      """
+
+   @classmethod
+   def FromProcessedFields (cls, noRows: int, noCols: int, procField: dict):
+      """Creates the board state from a dict {(col, row): state} or from a dict of dicts {(col, row): {'state': state, ...}}"""
+      board = cls (noRows, noCols)
+      board.Update (procField)
+      return board
+
+   def Copy (self):
+      board = clBoardState.__new__ (clBoardState)
+      board.noRows, board.noCols = self.noRows, self.noCols
+      board.grid = [row [:] for row in self.grid]
+      board.rowFilled, board.rowCross = self.rowFilled [:], self.rowCross [:]
+      board.colFilled, board.colCross = self.colFilled [:], self.colCross [:]
+      board.knownFields = self.knownFields.copy ()
+      return board
+
+   def Get (self, col: int, row: int):
+      return self.grid [row][col]
+
+   def Set (self, col: int, row: int, state):
+      """Sets the state of a field and updates the row and column masks. Returns True, if the state has changed"""
+      oldState = self.grid [row][col]
+      if oldState == state: return False
+      colBit, rowBit = 1 << col, 1 << row
+      if oldState == ClBlock.FILLED:
+         self.rowFilled [row] &= ~colBit
+         self.colFilled [col] &= ~rowBit
+      elif oldState == ClBlock.CROSS:
+         self.rowCross [row] &= ~colBit
+         self.colCross [col] &= ~rowBit
+
+      if state == ClBlock.FILLED:
+         self.rowFilled [row] |= colBit
+         self.colFilled [col] |= rowBit
+      elif state == ClBlock.CROSS:
+         self.rowCross [row] |= colBit
+         self.colCross [col] |= rowBit
+
+      self.grid [row][col] = state
+      if state == ClBlock.UNKNOWN: del self.knownFields [(col, row)]
+      else: self.knownFields [(col, row)] = state
+      return True
+
+   def Update (self, procField: dict):
+      """Sets all fields of a dict {(col, row): state} or a dict of dicts {(col, row): {'state': state, ...}}"""
+      for (col, row), attr in procField.items ():
+         # nb can be a dict of dict, or just a dict of state values:
+         self.Set (col, row, attr ['state'] if isinstance (attr, dict) else attr)
+
+   def LineMasks (self, useRows: bool, i: int):
+      """Returns the masks (filledMask, crossMask) of row i (useRows) or column i"""
+      if useRows: return self.rowFilled [i], self.rowCross [i]
+      return self.colFilled [i], self.colCross [i]
+
+   def LineSets (self, useRows: bool, i: int):
+      """Returns the sets (crossIndis, filledIndis) of the crossed and filled indices of row i (useRows) or column i"""
+      filledMask, crossMask = self.LineMasks (useRows, i)
+      return SetFromMask (crossMask), SetFromMask (filledMask)
+
+   def LineLength (self, useRows: bool):
+      return self.noCols if useRows else self.noRows
+
+   def NoLines (self, useRows: bool):
+      return self.noRows if useRows else self.noCols
+
+   def IsComplete (self):
+      return len (self.knownFields) == self.noRows * self.noCols
+#################################################################################
+# end of class clBoardState
+#################################################################################
@@ -0,0 +1,181 @@
+from enum import Enum
+
+import numpy as np
+
+import NonoBoard
+import NonoLineSolver
+
+#: Enum for the state of a row or column: 'OPEN DONE WRONG'
+#:    OPEN:  not finished yet
+#:    DONE:  the filled fields form exactly the blocks of the clue
+#:    WRONG: the filled fields cannot form the blocks of the clue any more
+EnLineState = Enum ('EnLineState', 'OPEN DONE WRONG')
+
+
+def LineRuns (line, filledCode = NonoBoard.clNonoBoard.FILLED):
+   """Returns the run-length encoding of the filled fields of a line (1D array of state codes) as tuple of the lengths"""
+   filled = np.concatenate (([False], line == filledCode, [False]))
+   edges = np.flatnonzero (filled [1:] != filled [:-1])
+   return tuple ((edges [1::2] - edges [0::2]).tolist ())
+
+
+#################################################################################
+# definition of class clCompletion  #ff00ff
+#################################################################################
+class clCompletion:
+   """Tracks the completion of each row and column of the board.
+
+   The tracker registers itself as observer of the board (see NonoBoard.clNonoBoard.observers), so only the rows and
+   columns of the changed fields are evaluated again, in O(line length) each. Whether the nonogram is solved or has
+   wrong lines, is known at any time without scanning the whole board.
+   """
+
+   def __init__(self, board: NonoBoard.clNonoBoard, rowBlocks: list, colBlocks: list):
+      self.board = board
+      self.clues = {True: [tuple (b.length for b in blocks if b.length) for blocks in rowBlocks],
+                    False: [tuple (b.length for b in blocks if b.length) for blocks in colBlocks]}
+      """{isRow: [clue of each line]}. The clue is the tuple of the block lengths without blocks of length 0"""
+      self.lineStates = {True: [EnLineState.OPEN] * board.noRows, False: [EnLineState.OPEN] * board.noCols}
+      """{isRow: [EnLineState of each line]}"""
+      self.noLines = board.noRows + board.noCols
+      self.noDone = 0   #: number of lines in state DONE
+      self.noWrong = 0  #: number of lines in state WRONG
+      for isRow in (True, False):
+         for i in range (board.NoLines (isRow)): self._Evaluate (isRow, i)
+      board.observers.append (self.Update)
+
+   def Close (self):
+      """Removes the tracker from the observers of the board"""
+      if self.Update in self.board.observers: self.board.observers.remove (self.Update)
+
+   def Update (self, cols, rows):
+      """Evaluates the rows and columns of the changed fields again. Called by the board"""
+      for row in np.unique (rows).tolist (): self._Evaluate (True, row)
+      for col in np.unique (cols).tolist (): self._Evaluate (False, col)
+
+   def _Evaluate (self, isRow: bool, i: int):
+      line = self.board.state [i] if isRow else self.board.state [:, i]
+      clue = self.clues [isRow][i]
+      runs = LineRuns (line)
+      if runs == clue:
+         state = EnLineState.DONE
+      elif not (line == self.board.UNKNOWN).any () or sum (runs) > sum (clue) or max (runs, default=0) > max (clue, default=0):
+         # without unknown fields the line is final. Too many filled fields or a too long block cannot become right by filling
+         state = EnLineState.WRONG
+      else:
+         state = EnLineState.OPEN
+
+      oldState = self.lineStates [isRow][i]
+      if state == oldState: return
+      self.noDone += (state == EnLineState.DONE) - (oldState == EnLineState.DONE)
+      self.noWrong += (state == EnLineState.WRONG) - (oldState == EnLineState.WRONG)
+      self.lineStates [isRow][i] = state
+
+   def LineState (self, isRow: bool, i: int):
+      return self.lineStates [isRow][i]
+
+   def IsSolved (self):
+      """True, if the filled fields of all rows and columns form their clues"""
+      return self.noDone == self.noLines
+
+   def WrongLines (self):
+      """Returns the list of (isRow, index) of all lines in state WRONG"""
+      return [(isRow, i) for isRow, states in self.lineStates.items () for i, state in enumerate (states)
+              if state == EnLineState.WRONG]
+#################################################################################
+# end of class clCompletion
+#################################################################################
+
+
+def PlacedBlocks (line, lengths):
+   """Returns for each block of lengths (without blocks of length 0), whether it is provably placed in the line (1D array
+   of state codes).
+
+   A block is placed, if its run of filled fields is decided on both ends (by a cross or the line edge) and only
+   decided fields lie between the run and the line edge, with the blocks before it placed as well. The line is
+   scanned from both edges. If the runs of the line form the clue, all blocks are placed.
+   A run inside the line, bounded by crosses or the line edges, is matched by the DP line solver: if only one block
+   can cover it in a valid permutation, this block is placed. This costs O(line length x number of blocks), so it is
+   only done, if such a run is left after the scan from the edges.
+   """
+   placed = [False] * len (lengths)
+   if not lengths: return placed
+   starts = np.concatenate (([0], np.flatnonzero (line [1:] != line [:-1]) + 1))
+   segLengths = np.diff (np.append (starts, len (line))).tolist ()
+   states = line [starts].tolist ()
+   FILLED, CROSS, UNKNOWN = NonoBoard.clNonoBoard.FILLED, NonoBoard.clNonoBoard.CROSS, NonoBoard.clNonoBoard.UNKNOWN
+
+   if [n for n, state in zip (segLengths, states) if state == FILLED] == list (lengths): return [True] * len (lengths)
+
+   matchedSegments = set ()  # the segments matched by the scan from the edges
+   for segments, blocks, step in ((range (len (states)), range (len (lengths)), 1),
+                                  (range (len (states) - 1, -1, -1), range (len (lengths) - 1, -1, -1), -1)):
+      blocks = iter (blocks)
+      for j in segments:
+         if states [j] == UNKNOWN: break
+         if states [j] != FILLED: continue
+         # the run is only final, if it is not followed by an unknown field
+         if 0 <= j + step < len (states) and states [j + step] == UNKNOWN: break
+         k = next (blocks, None)
+         if k is None or segLengths [j] != lengths [k]: break
+         placed [k] = True
+         matchedSegments.add (j)
+
+   # the runs of filled fields bounded by crosses or the line edges, which are not matched yet
+   segments = [j for j in range (len (states)) if states [j] == FILLED and j not in matchedSegments 
+               and (j == 0 or states [j-1] == CROSS) and (j == len (states) - 1 or states [j+1] == CROSS)]
+   if segments:
+      runs = [(starts [j].item (), starts [j].item () + segLengths [j]) for j in segments]
+      blocksOfRuns = NonoLineSolver.BlocksOfRuns (lengths, len (line), NonoBoard.MaskFromBools (line == FILLED), 
+                                                  NonoBoard.MaskFromBools (line == CROSS), runs)
+      # without a valid permutation (wrong fields) nothing more is placed
+      for blocks in blocksOfRuns or []:
+         if len (blocks) == 1: placed [blocks [0]] = True
+   return placed
+
+
+#################################################################################
+# definition of class clClueMatcher  #ff00ff
+#################################################################################
+class clClueMatcher:
+   """Sets ClBlock.isPlaced of the clue blocks, which are provably placed on the board (see PlacedBlocks).
+
+   Like clCompletion, the matcher is an observer of the board and evaluates only the rows and columns of the changed
+   fields again. The blocks whose isPlaced changed are collected in changedBlocks, so the game redraws only their
+   clue numbers.
+   """
+
+   def __init__(self, board: NonoBoard.clNonoBoard, rowBlocks: list, colBlocks: list):
+      self.board = board
+      self.blocks = {True: [[b for b in blocks if b.length] for blocks in rowBlocks],
+                     False: [[b for b in blocks if b.length] for blocks in colBlocks]}
+      """{isRow: [clue blocks of each line]} without blocks of length 0"""
+      self.lengths = {isRow: [[b.length for b in blocks] for blocks in lines] for isRow, lines in self.blocks.items ()}
+      self.changedBlocks = []  #: the blocks whose isPlaced changed since the last call of TakeChangedBlocks
+      for isRow in (True, False):
+         for i in range (board.NoLines (isRow)): self._Evaluate (isRow, i)
+      board.observers.append (self.Update)
+
+   def Close (self):
+      """Removes the matcher from the observers of the board"""
+      if self.Update in self.board.observers: self.board.observers.remove (self.Update)
+
+   def Update (self, cols, rows):
+      """Evaluates the rows and columns of the changed fields again. Called by the board"""
+      for row in np.unique (rows).tolist (): self._Evaluate (True, row)
+      for col in np.unique (cols).tolist (): self._Evaluate (False, col)
+
+   def _Evaluate (self, isRow: bool, i: int):
+      line = self.board.state [i] if isRow else self.board.state [:, i]
+      for block, placed in zip (self.blocks [isRow][i], PlacedBlocks (line, self.lengths [isRow][i])):
+         if block.isPlaced == placed: continue
+         block.isPlaced = placed
+         self.changedBlocks.append (block)
+
+   def TakeChangedBlocks (self):
+      """Returns the blocks whose isPlaced changed since the last call and clears the list"""
+      changed, self.changedBlocks = self.changedBlocks, []
+      return changed
+#################################################################################
+# end of class clClueMatcher
+#################################################################################
@@ -0,0 +1,333 @@
+import gc
+import mmap
+import struct
+
+import numpy as np
+
+import NonoBlock
+import NonoBoard
+
+BINARY_MAGIC = b'NOSB'  #: the first bytes of a binary nonogram file
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct ('<4sHHIIII')
+"""magic, version, reserved, noRows, noCols, noClues, number of bytes of the varints"""
+
+
+class clNonoFileError (ValueError):
+   """Invalid nonogram file. The message starts with the line number of the file, if the error belongs to a line"""
+
+   def __init__(self, message: str, lineNo: int = None):
+      super().__init__(message if lineNo is None else f'Dateizeile {lineNo}: {message}')
+      self.lineNo = lineNo  #: line number (1 based) of the error or None
+
+
+def ReadNonogramFromFile (fileName):
+   """Reads the nonogram from file. Needs no pygame display and no Qt application, so it can be used headless.
+
+      Returns the lists of the row and column blocks. If additional data about already processed fields ara available, 
+      the dictionary of processed fields will be filled.
+      A binary file (see SaveNonogramBinary) is detected and read as well. Errors are printed, see ParseNonogramFile.
+      Data format: Z/S n1 n2 ... Z for row data, S for column data; ni the blocklength 
+      Example for a 3 (rows) x 2 (columns) nonogram:
+      Z 2
+      Z 3 5
+      Z 1 1 1
+      S 3
+      S 1 2
+
+      Args:
+         filename (str): Path name of the file to read from.
+
+      Returns:
+         bool: The return value. True for success, False otherwise.
+         list: List of lists containing NonoBlock.ClBlock elements of the nonogram rows.
+               See instance variable rowBlocks of Nonogram_Game.NonogramGame.
+         list: List of lists containing NonoBlock.ClBlock elements of the nonogram columns.
+               See instance variable colBlocks of Nonogram_Game.NonogramGame.
+         dict: Dictionary of the processed fields: {(col, row): {'pos': (-1, -1), 'state': state, 'mode': mode}}.
+               Use NonoBoard.clNonoBoard.FromProcessedFields to get the board.
+   """
+   ok, rowBlocks, colBlocks, board = ReadNonogram (fileName)
+   if not ok: return False, None, None, None
+   cols, rows = board.KnownPositions ()
+   states, modes = board.GetCodes (cols, rows)
+   processedFields = {(c, r): {'pos': (-1, -1), 'state': board.STATES [s], 'mode': board.MODES [m]} 
+                      for c, r, s, m in zip (cols.tolist (), rows.tolist (), states.tolist (), modes.tolist ())}
+   return True, rowBlocks, colBlocks, processedFields
+
+
+def ReadNonogram (fileName):
+   """Reads a text or a binary nonogram file, the format is detected by the first bytes. Errors are printed.
+
+      Returns:
+         bool: True for success, False otherwise.
+         list: List of lists containing NonoBlock.ClBlock elements of the nonogram rows.
+         list: List of lists containing NonoBlock.ClBlock elements of the nonogram columns.
+         NonoBoard.clNonoBoard: The board with the processed fields.
+   """
+   try:
+      return (True, *ParseNonogramFile (fileName))
+   except (OSError, clNonoFileError) as e:
+      print (f'Fehler beim Lesen von {fileName}: {e}')
+      return False, None, None, None
+
+
+def ParseNonogramFile (fileName):
+   """Reads a text or a binary nonogram file and checks the clues, see CheckClues.
+
+      Returns:
+         list: List of lists containing NonoBlock.ClBlock elements of the nonogram rows.
+         list: List of lists containing NonoBlock.ClBlock elements of the nonogram columns.
+         NonoBoard.clNonoBoard: The board with the processed fields.
+
+      Raises:
+         clNonoFileError: The file is not a valid nonogram. The message contains the line number, if possible.
+            Other value errors (e.g. a file which is not a text file) are raised as clNonoFileError with the file name.
+         OSError: The file cannot be read.
+   """
+   try:
+      if IsBinaryNonogramFile (fileName):
+         rowBlocks, colBlocks, board = _ParseBinary (fileName)
+         CheckClues (rowBlocks, colBlocks)
+      else:
+         with open (fileName) as f:
+            rowBlocks, colBlocks, board, rowLineNos, colLineNos = _ParseText (f)
+         CheckClues (rowBlocks, colBlocks, rowLineNos, colLineNos)
+   except clNonoFileError:
+      raise
+   except UnicodeDecodeError as e:
+      raise clNonoFileError (f'{fileName} ist keine Textdatei: {e}') from None
+   except ValueError as e:
+      raise clNonoFileError (f'Falsches Datenformat in {fileName}: {e}') from None
+   return rowBlocks, colBlocks, board
+
+
+def IsBinaryNonogramFile (fileName):
+   """Returns True, if the file starts with BINARY_MAGIC"""
+   try:
+      with open (fileName, 'rb') as f:
+         return f.read (len (BINARY_MAGIC)) == BINARY_MAGIC
+   except OSError:
+      return False
+
+
+def CheckClues (rowBlocks: list, colBlocks: list, rowLineNos: list = None, colLineNos: list = None):
+   """Cheap consistency checks of the clues, so an invalid nonogram is rejected before the solver starts:
+      there is at least one row and one column, the blocks of each line fit into the line and the sum of all row blocks
+      equals the sum of all column blocks. 
+
+      Args:
+         rowLineNos, colLineNos: The line numbers of the rows and columns in the file, if known.
+
+      Raises:
+         clNonoFileError: The first failed check.
+   """
+   if not rowBlocks or not colBlocks: raise clNonoFileError ('Keine Zeilen oder keine Spalten gefunden')
+   for blocksOfLines, lineNos, lineLength, what in ((rowBlocks, rowLineNos, len (colBlocks), 'Zeile'), 
+                                                      (colBlocks, colLineNos, len (rowBlocks), 'Spalte')):
+      for i, blocks in enumerate (blocksOfLines):
+         lengths = [block.length for block in blocks if block.length]
+         minLength = sum (lengths) + len (lengths) - 1  # with one cross between the blocks
+         if minLength > lineLength:
+            raise clNonoFileError (f'Die Blöcke der {what} {i+1} brauchen {minLength} Felder, die Länge ist {lineLength}', 
+                                   lineNos [i] if lineNos else None)
+   rowSum = sum (block.length for blocks in rowBlocks for block in blocks)
+   colSum = sum (block.length for blocks in colBlocks for block in blocks)
+   if rowSum != colSum: 
+      raise clNonoFileError (f'Die Summe der Zeilenblöcke ({rowSum}) ist ungleich der Summe der Spaltenblöcke ({colSum})')
+
+
+#  text file format  #############################################################
+
+def _ParseBlocks (data: list, lineNo: int):
+   """Returns the list of NonoBlock.ClBlock of the sections [lengths, states, modes] of a line"""
+   try:
+      lengths = [int (n) for n in data [0].split ()]
+   except ValueError:
+      raise clNonoFileError (f'Ungültige Blocklänge in "{data [0].strip ()}"', lineNo) from None
+   if not lengths or min (lengths) < 0: raise clNonoFileError ('Ungültige Blocklängen', lineNo)
+   if len (data) == 1: return [NonoBlock.ClBlock (length) for length in lengths]
+
+   states, modes = data [1], data [2]
+   if len (states) != len (lengths) or len (modes) != len (lengths):
+      raise clNonoFileError (f'{len (lengths)} Blöcke, aber {len (states)} Zustände und {len (modes)} Modi', lineNo)
+   try:
+      return [NonoBlock.ClBlock (length, state = s, mode = m) for length, s, m in zip (lengths, states, modes)]
+   except ValueError:
+      raise clNonoFileError (f'Ungültiger Zustand "{states}" oder Modus "{modes}" der Blöcke', lineNo) from None
+
+
+def _ParseText (f):
+   """Parses the text format line by line, see ReadNonogramFromFile. 
+      Returns rowBlocks, colBlocks, board and the line numbers of the rows and of the columns
+   """
+   rowBlocks, colBlocks, rowLineNos, colLineNos = [], [], [], []
+   fieldTexts = []  # (row, lineNo, state/mode characters of the fields) of the rows with processed fields
+   for lineNo, line in enumerate (f, 1):
+      line = line.rstrip ()
+      if not line: continue
+      kind = line [0].upper ()
+      # if the input line contains '#' block state /mode are available, for rows also state/mode of the fields
+      data = line [1:].split ('#')
+      if kind == 'Z':
+         if len (data) not in (1, 4): raise clNonoFileError ('Eine Zeile braucht 1 oder 4 durch # getrennte Teile', lineNo)
+         if len (data) == 4: fieldTexts.append ((len (rowBlocks), lineNo, data [3]))
+         rowBlocks.append (_ParseBlocks (data, lineNo))
+         rowLineNos.append (lineNo)
+      elif kind == 'S':
+         if len (data) not in (1, 3): raise clNonoFileError ('Eine Spalte braucht 1 oder 3 durch # getrennte Teile', lineNo)
+         colBlocks.append (_ParseBlocks (data, lineNo))
+         colLineNos.append (lineNo)
+      else:
+         raise clNonoFileError ("Die Zeile beginnt nicht mit 'Z' oder 'S'", lineNo)
+
+   board = NonoBoard.clNonoBoard (len (rowBlocks), len (colBlocks))
+   if fieldTexts: _SetFieldsFromText (board, fieldTexts)
+   return rowBlocks, colBlocks, board, rowLineNos, colLineNos
+
+
+def _CodeTable (chars):
+   """Returns a lookup table: byte -> code (index in chars), 255 for invalid bytes"""
+   table = np.full (256, 255, dtype=np.uint8)
+   for code, char in enumerate (chars): table [ord (char)] = code
+   return table
+
+
+def _SetFieldsFromText (board: NonoBoard.clNonoBoard, fieldTexts: list):
+   """Sets the fields of the rows from their state/mode characters (see clNonoBoard.RowText) in one NumPy step"""
+   for _, lineNo, text in fieldTexts:
+      if len (text) != 2 * board.noCols: 
+         raise clNonoFileError (f'{len (text)} statt {2 * board.noCols} Zeichen für die Felder', lineNo)
+   chars = np.frombuffer (''.join (text for _, _, text in fieldTexts).encode ('ascii', 'replace'), dtype=np.uint8)
+   chars = chars.reshape (len (fieldTexts), 2 * board.noCols)
+   stateCodes = _CodeTable (board.STATES) [chars [:, 0::2]]
+   modeCodes = _CodeTable (board.MODES) [chars [:, 1::2]]
+   invalid = ((stateCodes == 255) | (modeCodes == 255)).any (axis = 1)
+   if invalid.any (): raise clNonoFileError ('Ungültiger Zustand oder Modus der Felder', fieldTexts [int (invalid.argmax ())][1])
+   # the mode of an unknown field is not used
+   modeCodes [stateCodes == board.UNKNOWN] = board.NORMAL
+   rows = [row for row, _, _ in fieldTexts]
+   board.state [rows] = stateCodes
+   board.mode [rows] = modeCodes
+
+
+#  binary file format  ###########################################################
+#  The binary file is the header _BINARY_HEADER followed by
+#     the clues as varints (7 bits per byte, the high bit is set in all bytes except the last one of a number): 
+#        first the number of blocks of each row and each column, then the lengths of all blocks in the same order
+#     the state codes of all blocks, 2 bits each     the mode codes of all blocks, 1 bit each
+#     the state codes of all fields, 2 bits each     the mode codes of all fields, 1 bit each
+#  The codes are those of NonoBoard.clNonoBoard, the fields are stored row by row. 
+#  All bit planes start at a byte, the first value is stored in the lowest bits.
+
+def _EncodeVarints (values):
+   values = np.asarray (values, dtype=np.uint64)
+   noBytes = np.ones (len (values), dtype=np.intp)
+   rest = values >> np.uint64 (7)
+   while rest.any ():
+      noBytes += rest > 0
+      rest >>= np.uint64 (7)
+   ends = np.cumsum (noBytes)
+   starts = ends - noBytes
+   data = np.empty (int (ends [-1]) if len (ends) else 0, dtype=np.uint8)
+   for i in range (int (noBytes.max ()) if len (noBytes) else 0):
+      sel = noBytes > i
+      byte = (values [sel] >> np.uint64 (7 * i)) & np.uint64 (0x7f)
+      data [starts [sel] + i] = byte | np.where (noBytes [sel] > i + 1, 0x80, 0).astype (np.uint64)
+   return data.tobytes ()
+
+
+def _DecodeVarints (data, count):
+   """Returns the first count numbers of the varints in the uint8 array data and the number of bytes used"""
+   ends = np.flatnonzero (data < 0x80) [:count]
+   if len (ends) < count: raise ValueError ('truncated varints')
+   noBytes = int (ends [-1]) + 1 if count else 0
+   starts = np.concatenate (([0], ends [:-1] + 1)).astype (np.intp)
+   shifts = 7 * (np.arange (noBytes) - np.repeat (starts, ends - starts + 1))
+   if noBytes and shifts.max () > 56: raise ValueError ('varint too large')
+   parts = (data [:noBytes] & 0x7f).astype (np.int64) << shifts
+   return (np.add.reduceat (parts, starts) if count else np.zeros (0, np.int64)), noBytes
+
+
+def _Pack2Bits (codes):
+   codes = np.ascontiguousarray (codes, dtype=np.uint8).ravel ()
+   padded = np.zeros (-(-len (codes) // 4) * 4, dtype=np.uint8)
+   padded [:len (codes)] = codes
+   quads = padded.reshape (-1, 4)
+   return (quads [:, 0] | quads [:, 1] << 2 | quads [:, 2] << 4 | quads [:, 3] << 6).tobytes ()
+
+
+def _Unpack2Bits (data, count):
+   return ((data [:, None] >> np.array ([0, 2, 4, 6], dtype=np.uint8)) & 3).ravel () [:count]
+
+
+def _PackBits (codes):
+   return np.packbits (np.ascontiguousarray (codes, dtype=np.uint8).ravel (), bitorder='little').tobytes ()
+
+
+def _UnpackBits (data, count):
+   return np.unpackbits (data, count=count, bitorder='little')
+
+
+def SaveNonogramBinary (fileName, rowBlocks: list, colBlocks: list, board: NonoBoard.clNonoBoard):
+   """Writes the nonogram with the state and mode of all blocks and fields in the binary format"""
+   lines = rowBlocks + colBlocks
+   blocks = [block for line in lines for block in line]
+   lengths = np.fromiter ((block.length for block in blocks), dtype=np.int64, count=len (blocks))
+   counts = np.fromiter ((len (line) for line in lines), dtype=np.int64, count=len (lines))
+   stateCode, modeCode = NonoBoard.clNonoBoard.STATE_CODE, NonoBoard.clNonoBoard.MODE_CODE
+   blockStates = np.fromiter ((stateCode [block.state] for block in blocks), dtype=np.uint8, count=len (blocks))
+   blockModes = np.fromiter ((modeCode [block.mode] for block in blocks), dtype=np.uint8, count=len (blocks))
+   varints = _EncodeVarints (np.concatenate ((counts, lengths)))
+
+   with open (fileName, 'wb') as f:
+      f.write (b''.join ((
+         _BINARY_HEADER.pack (BINARY_MAGIC, BINARY_VERSION, 0, len (rowBlocks), len (colBlocks), len (blocks), len (varints)),
+         varints, _Pack2Bits (blockStates), _PackBits (blockModes), _Pack2Bits (board.state), _PackBits (board.mode))))
+
+
+def _ParseBinary (fileName):
+   """Returns rowBlocks, colBlocks and board of a binary nonogram file. The file is mapped into memory and the bit planes
+      are unpacked with NumPy directly into the board arrays.
+      The board is read in a few ten milliseconds, but one NonoBlock.ClBlock is created for each clue. For a random
+      1000x1000 nonogram (500k clues) this takes about 0.6 s, nearly all of the reading time.
+   """
+   try:
+      with open (fileName, 'rb') as f, mmap.mmap (f.fileno (), 0, access=mmap.ACCESS_READ) as mm:
+         magic, version, _, noRows, noCols, noClues, noVarintBytes = _BINARY_HEADER.unpack_from (mm)
+         if magic != BINARY_MAGIC or version != BINARY_VERSION: raise ValueError ('unbekanntes Format')
+         noFields = noRows * noCols
+         sizes = (noVarintBytes, -(-noClues // 4), -(-noClues // 8), -(-noFields // 4), -(-noFields // 8))
+         if _BINARY_HEADER.size + sum (sizes) != len (mm): raise ValueError ('falsche Dateigröße')
+         # the views into the mapped file must be released before it is closed
+         data = np.frombuffer (mm, dtype=np.uint8, offset=_BINARY_HEADER.size)
+         planes = []
+         try:
+            planes = np.split (data, np.cumsum (sizes) [:-1])
+            numbers, _ = _DecodeVarints (planes [0], noRows + noCols + noClues)
+            blockStates = _Unpack2Bits (planes [1], noClues)
+            blockModes = _UnpackBits (planes [2], noClues)
+            stateCodes = _Unpack2Bits (planes [3], noFields).reshape (noRows, noCols)
+            modeCodes = _UnpackBits (planes [4], noFields).reshape (noRows, noCols)
+         finally:
+            del data, planes
+   except (ValueError, struct.error) as e:
+      raise clNonoFileError (f'Falsches Datenformat: {e}') from None
+
+   counts, lengths = numbers [:noRows + noCols], numbers [noRows + noCols:]
+   if counts.sum () != noClues or blockStates.max (initial=0) > 2 or stateCodes.max (initial=0) > 2:
+      raise clNonoFileError ('Falsches Datenformat')
+
+   states, modes = NonoBoard.clNonoBoard.STATES, NonoBoard.clNonoBoard.MODES
+   # None of the new clue objects can be garbage, but the cyclic garbage collector would run many times while they
+   # are created. Pausing it halves the time for large nonograms
+   gcEnabled = gc.isenabled ()
+   gc.disable ()
+   try:
+      blocks = [NonoBlock.ClBlock (length, state=states [s], mode=modes [m]) 
+                for length, s, m in zip (lengths.tolist (), blockStates.tolist (), blockModes.tolist ())]
+   finally:
+      if gcEnabled: gc.enable ()
+   ends = np.cumsum (counts).tolist ()
+   lines = [blocks [end - count:end] for end, count in zip (ends, counts.tolist ())]
+   return lines [:noRows], lines [noRows:], NonoBoard.clNonoBoard.FromCodes (stateCodes, modeCodes)
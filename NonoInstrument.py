@@ -0,0 +1,164 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+import Sec2HumanReadable as s2h
+
+
+#################################################################################
+# definition of class clInstrument  #ff00ff
+#################################################################################
+class clInstrument:
+   """Delivers the events of the solver to the registered sinks.
+
+   A sink is a callable sink (event, data), where event is the name of the event and data a dict. The solver checks
+   `if instrument:` before collecting the data of an event, so without any sink the events cost nearly nothing.
+
+   Events of NonogramAssist.NonoAssist:
+      'line':  one line solve. data: isRow, index, time (sec, None if solved by the process pool), newCells,
+               permutations (run through by the stepper line solvers), cached (taken from the line cache),
+               threshold (permutation threshold of FillFieldsWithPresets, None otherwise), contradiction
+      'sweep': progress of the solver. data: phase, lineSolves, knownFields, noFields, elapsed (sec)
+      'phase': end of a phase of the solver. data: phase, time (sec)
+      'solve': end of NonogramSolver. data: solved, contradiction (the nonogram has no solution), lineSolves, 
+               permutations, knownFields, noFields, elapsed (sec)
+      'permutations': sent by EmitPermutationsOfRowsAndCols. data: rows, cols (lists of the number of permutations)
+   """
+
+   def __init__(self):
+      self.sinks = []  #: list of the registered callables sink (event, data)
+
+   def AddSink (self, sink):
+      """Registers a sink and returns it"""
+      self.sinks.append (sink)
+      return sink
+
+   def RemoveSink (self, sink):
+      self.sinks.remove (sink)
+
+   def __bool__ (self):
+      return bool (self.sinks)
+
+   def Emit (self, event: str, **data):
+      for sink in self.sinks:
+         sink (event, data)
+
+   @contextmanager
+   def Phase (self, phase: str):
+      """Context manager which emits a 'phase' event with the wall time of the block"""
+      if not self.sinks:
+         yield
+         return
+      startTime = time.perf_counter ()
+      try:
+         yield
+      finally:
+         self.Emit ('phase', phase=phase, time=time.perf_counter () - startTime)
+#################################################################################
+# end of class clInstrument
+#################################################################################
+
+
+#################################################################################
+# definition of class clPrintSink  #ff00ff
+#################################################################################
+class clPrintSink:
+   """Prints the progress of the solver and the permutations of the lines in a human readable form"""
+
+   def __init__(self, file = None):
+      self.file = file  #: the text file the output is printed to. If None, sys.stdout at the time of the print
+
+   def __call__ (self, event: str, data: dict):
+      file = self.file or sys.stdout
+      if event == 'permutations':
+         for i, noPerms in enumerate (data ['rows']):
+            print (f'{i+1:>3}. row has {noPerms:>10} permutations', file=file)
+         for i, noPerms in enumerate (data ['cols']):
+            print (f'{i+1:>3}. columns has {noPerms:>10} permutations', file=file)
+         return
+      if event == 'sweep':
+         if data ['phase'] == 'FillObviousFields': what = 'filling overlapped'
+         elif data ['phase'] == 'Probe': what = 'probing'
+         else: what = f'{data ["lineSolves"]} line solves'
+      elif event == 'solve':
+         what = f'{data ["lineSolves"]} line solves'
+      else: return
+      print (f'{s2h.human_time_duration (data ["elapsed"])} for {what}; {data ["knownFields"]} of {data ["noFields"]}', file=file)
+#################################################################################
+# end of class clPrintSink
+#################################################################################
+
+
+#################################################################################
+# definition of class clJsonLinesSink  #ff00ff
+#################################################################################
+class clJsonLinesSink:
+   """Writes each event as one JSON line {'event': event, 't': sec since creation of the sink, **data}"""
+
+   def __init__(self, file):
+      """
+         Args:
+            file: An open text file or a path name. A path name is opened for writing and closed by Close.
+      """
+      self._ownsFile = isinstance (file, str)
+      self.file = open (file, 'w') if self._ownsFile else file  #: the file the events are written to
+      self._startTime = time.perf_counter ()
+
+   def __call__ (self, event: str, data: dict):
+      self.file.write (json.dumps ({'event': event, 't': round (time.perf_counter () - self._startTime, 6), **data}) + '\n')
+
+   def Close (self):
+      if self._ownsFile: self.file.close ()
+      else: self.file.flush ()
+#################################################################################
+# end of class clJsonLinesSink
+#################################################################################
+
+
+#################################################################################
+# definition of class clSummarySink  #ff00ff
+#################################################################################
+class clSummarySink:
+   """Aggregates the 'line' and 'phase' events, to see which lines dominate the solve time"""
+
+   def __init__(self):
+      self.lines = {}   #: {(isRow, index): {'solves', 'cached', 'time', 'newCells', 'permutations', 'maxThreshold'}}
+      self.phases = {}  #: {phase: total time}
+
+   def __call__ (self, event: str, data: dict):
+      if event == 'line':
+         stat = self.lines.get ((data ['isRow'], data ['index']))
+         if stat is None:
+            stat = self.lines [(data ['isRow'], data ['index'])] = \
+               {'solves': 0, 'cached': 0, 'time': 0.0, 'newCells': 0, 'permutations': 0, 'maxThreshold': None}
+         stat ['solves'] += 1
+         stat ['cached'] += bool (data.get ('cached'))
+         stat ['time'] += data.get ('time') or 0.0
+         stat ['newCells'] += data.get ('newCells', 0)
+         stat ['permutations'] += data.get ('permutations', 0)
+         if data.get ('threshold') is not None:
+            stat ['maxThreshold'] = max (stat ['maxThreshold'] or 0, data ['threshold'])
+      elif event == 'phase':
+         self.phases [data ['phase']] = self.phases.get (data ['phase'], 0.0) + data ['time']
+
+   def Table (self, top = 20):
+      """Returns the summary as text: the time of each phase and the top lines with the most solve time"""
+      text = [f'{"phase":<20} {"time":>12}']
+      for phase, phaseTime in self.phases.items ():
+         text.append (f'{phase:<20} {s2h.human_time_duration (phaseTime):>12}')
+      text.append ('')
+      text.append (f'{"line":<10} {"solves":>7} {"cached":>7} {"time ms":>9} {"cells":>6} {"permutations":>13} {"threshold":>10}')
+      ranking = sorted (self.lines.items (), key = lambda item: item [1]['time'], reverse = True)
+      for (isRow, index), stat in ranking [:top]:
+         name = f'{"row" if isRow else "col"} {index + 1}'
+         threshold = '' if stat ['maxThreshold'] is None else stat ['maxThreshold']
+         text.append (f'{name:<10} {stat ["solves"]:>7} {stat ["cached"]:>7} {stat ["time"] * 1000:>9.3f} '
+                      f'{stat ["newCells"]:>6} {stat ["permutations"]:>13} {threshold:>10}')
+      return '\n'.join (text)
+
+   def Print (self, top = 20):
+      print (self.Table (top))
+#################################################################################
+# end of class clSummarySink
+#################################################################################
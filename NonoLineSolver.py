@@ -0,0 +1,255 @@
+import math
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+#################################################################################
+# Line solver using dynamic programming  #00ffff
+#################################################################################
+# All positions of a line are given as int bit masks: bit i corresponds to field i of the line.
+# Instead of running through all permutations of the blocks we calculate for each prefix (suffix) of the
+# line, if the first (last) blocks can be placed consistently with the known fields. From this forward and
+# backward reachability we get for each field, if it can be empty and if it can be covered by a block.
+# The time is O(line length x number of blocks).
+
+
+def _CrossPrefix (noFields: int, crossMask: int) -> List[int]:
+   """crossPrefix [i] is the number of crosses in the fields 0..i-1"""
+   crossPrefix = [0] * (noFields + 1)
+   for i in range (noFields):
+      crossPrefix [i+1] = crossPrefix [i] + ((crossMask >> i) & 1)
+   return crossPrefix
+
+
+def _ForwardReachable (lengths: List[int], noFields: int, filled: List[bool], crossPrefix: List[int]) -> List[List[bool]]:
+   """fwd [j][i] is True, if the fields 0..i-1 can hold exactly the first j blocks"""
+   k = len (lengths)
+   fwd = [[False] * (noFields + 1) for _ in range (k + 1)]
+   fwd [0][0] = True
+   for j in range (k + 1):
+      row = fwd [j]
+      L = lengths [j-1] if j > 0 else 0
+      pred = fwd [j-1] if j > 0 else None
+      for i in range (1, noFields + 1):
+         # field i-1 is empty
+         if row [i-1] and not filled [i-1]:
+            row [i] = True
+            continue
+         # block j-1 ends at field i-1
+         if j > 0:
+            s = i - L
+            if s < 0 or crossPrefix [i] != crossPrefix [s]: continue
+            if s == 0: row [i] = j == 1
+            else: row [i] = not filled [s-1] and pred [s-1]
+   return fwd
+
+
+def _BackwardReachable (lengths: List[int], noFields: int, filled: List[bool], crossPrefix: List[int]) -> List[List[bool]]:
+   """bwd [j][i] is True, if the fields i..noFields-1 can hold exactly the blocks j..k-1"""
+   k = len (lengths)
+   bwd = [[False] * (noFields + 1) for _ in range (k + 1)]
+   bwd [k][noFields] = True
+   for j in range (k, -1, -1):
+      row = bwd [j]
+      L = lengths [j] if j < k else 0
+      succ = bwd [j+1] if j < k else None
+      for i in range (noFields - 1, -1, -1):
+         # field i is empty
+         if row [i+1] and not filled [i]:
+            row [i] = True
+            continue
+         # block j starts at field i
+         if j < k:
+            e = i + L
+            if e > noFields or crossPrefix [e] != crossPrefix [i]: continue
+            if e == noFields: row [i] = j == k - 1
+            else: row [i] = not filled [e] and succ [e+1]
+   return bwd
+
+
+def SolveLine (lengths: List[int], noFields: int, filledMask: int = 0, crossMask: int = 0) -> Optional[Tuple[int, int]]:
+   """Calculates all fields of a partly known line, which are filled resp. crossed in every valid permutation.
+
+      Args:
+         lengths (list): The block lengths of the line. Blocks of length 0 are ignored.
+         noFields (int): The length of the line.
+         filledMask (int): Bit mask of the fields known to be filled.
+         crossMask (int): Bit mask of the fields known to be crosses.
+
+      Returns:
+         tuple: (forcedFilledMask, forcedCrossMask). The known fields are part of the masks.
+         None: if there is no valid permutation (the known fields contradict the block lengths).
+   """
+   lengths = [L for L in lengths if L > 0]
+   fullMask = (1 << noFields) - 1
+   if filledMask & crossMask: return None
+   if not lengths:
+      return None if filledMask else (0, fullMask)
+
+   k = len (lengths)
+   filled = [bool ((filledMask >> i) & 1) for i in range (noFields)]
+   crossPrefix = _CrossPrefix (noFields, crossMask)
+   fwd = _ForwardReachable (lengths, noFields, filled, crossPrefix)
+   if not fwd [k][noFields]: return None
+   bwd = _BackwardReachable (lengths, noFields, filled, crossPrefix)
+
+   # a field can be empty, if the blocks 0..j-1 fit left and the blocks j..k-1 right of it
+   canBeEmptyMask = 0
+   for c in range (noFields):
+      if filled [c]: continue
+      for j in range (k + 1):
+         if fwd [j][c] and bwd [j][c+1]:
+            canBeEmptyMask |= 1 << c
+            break
+
+   # a field can be filled, if it is covered by a valid placement of any block. We mark the covered
+   # ranges by a difference array
+   cover = [0] * (noFields + 1)
+   for j, L in enumerate (lengths):
+      for s in range (noFields - L + 1):
+         e = s + L
+         if crossPrefix [e] != crossPrefix [s]: continue
+         if s == 0:
+            if j != 0: continue
+         elif filled [s-1] or not fwd [j][s-1]: continue
+         if e == noFields:
+            if j != k - 1: continue
+         elif filled [e] or not bwd [j+1][e+1]: continue
+         cover [s] += 1
+         cover [e] -= 1
+   canBeFilledMask = 0
+   running = 0
+   for c in range (noFields):
+      running += cover [c]
+      if running: canBeFilledMask |= 1 << c
+
+   return fullMask & ~canBeEmptyMask, fullMask & ~canBeFilledMask
+
+
+def BlocksOfRuns (lengths: List[int], noFields: int, filledMask: int, crossMask: int, runs: List[Tuple[int, int]]) -> Optional[List[List[int]]]:
+   """Calculates for runs of filled fields, which blocks can cover them in a valid permutation.
+
+      Args:
+         lengths (list): The block lengths of the line without blocks of length 0.
+         noFields (int): The length of the line.
+         filledMask (int), crossMask (int): Bit masks of the known filled and crossed fields.
+         runs (list): (start, end) of runs of filled fields (end exclusive). Each run must be bounded by crosses or
+                      the line edges, so it is covered by exactly one block.
+
+      Returns:
+         list: For each run the list of the indices of all blocks, which can cover exactly this run.
+         None: if there is no valid permutation.
+   """
+   k = len (lengths)
+   filled = [bool ((filledMask >> i) & 1) for i in range (noFields)]
+   crossPrefix = _CrossPrefix (noFields, crossMask)
+   fwd = _ForwardReachable (lengths, noFields, filled, crossPrefix)
+   if not fwd [k][noFields]: return None
+   bwd = _BackwardReachable (lengths, noFields, filled, crossPrefix)
+
+   blocksOfRuns = []
+   for s, e in runs:
+      # block j covers the run, if the blocks 0..j-1 fit left of the cross before the run and j+1..k-1 right of the cross after it
+      blocksOfRuns.append ([j for j, L in enumerate (lengths) 
+                            if L == e - s and (fwd [j][s-1] if s > 0 else j == 0) 
+                                          and (bwd [j+1][e+1] if e < noFields else j == k - 1)])
+   return blocksOfRuns
+
+
+#################################################################################
+# Counting the permutations of a line  #00ffff
+#################################################################################
+
+def CountLinePermutations (lengths: List[int], noFields: int, filledMask: int = 0, crossMask: int = 0) -> int:
+   """Calculates the exact number of permutations of the blocks in a partly known line. 
+   Only permutations are counted, which cover all filled fields and no crossed field. The forward 
+   recursion is the same as in _ForwardReachable, but instead of the reachability we count the number 
+   of possibilities. All calculations are done with (arbitrary long) integers.
+
+      Args:
+         lengths (list): The block lengths of the line. Blocks of length 0 are ignored.
+         noFields (int): The length of the line.
+         filledMask (int): Bit mask of the fields known to be filled.
+         crossMask (int): Bit mask of the fields known to be crosses.
+
+      Returns:
+         int: The number of valid permutations. 0 if the known fields contradict the block lengths.
+   """
+   lengths = [L for L in lengths if L > 0]
+   if filledMask & crossMask: return 0
+   filled = [bool ((filledMask >> i) & 1) for i in range (noFields)]
+   crossPrefix = _CrossPrefix (noFields, crossMask)
+
+   k = len (lengths)
+   # count [j][i] is the number of possibilities to place the first j blocks in the fields 0..i-1
+   count = [[0] * (noFields + 1) for _ in range (k + 1)]
+   count [0][0] = 1
+   for j in range (k + 1):
+      row = count [j]
+      L = lengths [j-1] if j > 0 else 0
+      pred = count [j-1] if j > 0 else None
+      for i in range (1, noFields + 1):
+         # field i-1 is empty
+         n = 0 if filled [i-1] else row [i-1]
+         # or block j-1 ends at field i-1
+         if j > 0:
+            s = i - L
+            if s >= 0 and crossPrefix [i] == crossPrefix [s]:
+               if s == 0: n += j == 1
+               elif not filled [s-1]: n += pred [s-1]
+         row [i] = n
+   return count [k][noFields]
+
+
+def LogCountLinePermutations (lengths: List[int], noFields: int, filledMask: int = 0, crossMask: int = 0) -> float:
+   """The same as CountLinePermutations, but returns the binary logarithm of the number of permutations.
+   Usefull to compare or sum up huge numbers. Returns -math.inf, if there is no valid permutation.
+   """
+   count = CountLinePermutations (lengths, noFields, filledMask, crossMask)
+   return math.log2 (count) if count else -math.inf
+
+
+#################################################################################
+# definition of class clLineSolveCache  #ff00ff
+#################################################################################
+class clLineSolveCache:
+   """LRU cache in front of SolveLine. The key is (block lengths, line length, filled mask, cross mask), so
+   a line is not solved again, if its state has not changed since the last sweep, and different lines with
+   the same block lengths and the same state share one entry. 
+   """
+   _NOT_CACHED = object ()
+
+   def __init__(self, maxSize = 0x10000):
+      self.maxSize = maxSize  #: The maximum number of entries. If exceeded, the least recently used entry is removed
+      self.hits = 0           #: Number of calls answered from the cache
+      self.misses = 0         #: Number of calls which needed to call SolveLine
+      self._cache = OrderedDict ()
+
+   def SolveLine (self, lengths: tuple, noFields: int, filledMask: int = 0, crossMask: int = 0) -> Optional[Tuple[int, int]]:
+      """The same as NonoLineSolver.SolveLine, but the result is taken from the cache if available"""
+      key = (tuple (lengths), noFields, filledMask, crossMask)
+      result = self._cache.get (key, self._NOT_CACHED)
+      if result is not self._NOT_CACHED:
+         self._cache.move_to_end (key)
+         self.hits += 1
+         return result
+
+      self.misses += 1
+      result = SolveLine (lengths, noFields, filledMask, crossMask)
+      self._cache [key] = result
+      if len (self._cache) > self.maxSize: self._cache.popitem (last=False)
+      return result
+
+   def Clear (self):
+      self._cache.clear ()
+      self.hits = self.misses = 0
+
+   def __len__ (self):
+      return len (self._cache)
+
+   def Info (self):
+      """Returns a dict with the number of hits, misses, the current and the maximum size of the cache"""
+      return {'hits': self.hits, 'misses': self.misses, 'size': len (self._cache), 'maxSize': self.maxSize}
+#################################################################################
+# end of class clLineSolveCache
+#################################################################################
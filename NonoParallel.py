@@ -0,0 +1,105 @@
+import os
+import math
+import multiprocessing
+from typing import List, Optional, Tuple
+
+import NonoLineSolver
+
+
+#################################################################################
+# Functions running in the worker processes  #00ffff
+#################################################################################
+# The block lengths of all rows and columns are shipped once to each worker by the initializer of the pool.
+# A task is a batch of lines, each given by (isRow, index, filledMask, crossMask). So only a few ints per line
+# are sent to the workers and back.
+
+_rowLengths = None   #: block lengths of all rows. Set in the worker process by _InitWorker
+_colLengths = None   #: block lengths of all columns. Set in the worker process by _InitWorker
+_lineCache = None    #: LRU cache of the line solves of the worker process
+
+
+def _InitWorker (rowLengths: list, colLengths: list):
+   global _rowLengths, _colLengths, _lineCache
+   _rowLengths, _colLengths = rowLengths, colLengths
+   _lineCache = NonoLineSolver.clLineSolveCache ()
+
+
+def _SolveBatch (batch: list) -> list:
+   """Solves a batch of lines [(isRow, index, filledMask, crossMask), ...].
+   Returns the list of the results of NonoLineSolver.SolveLine in the same order
+   """
+   results = []
+   for isRow, i, filledMask, crossMask in batch:
+      lengths, noFields = (_rowLengths [i], len (_colLengths)) if isRow else (_colLengths [i], len (_rowLengths))
+      results.append (_lineCache.SolveLine (lengths, noFields, filledMask, crossMask))
+   return results
+
+
+#################################################################################
+# definition of class clLinePool  #ff00ff
+#################################################################################
+class clLinePool:
+   """Persistent pool of processes to solve many lines of one nonogram in parallel.
+
+   The pool is started once for a nonogram and stays warm across solver calls. The block lengths are sent to
+   each worker when the pool is started, for each line only the masks of the known fields are sent. The lines
+   are split into batches, so that each worker gets only a few tasks per call.
+   """
+   MIN_PARALLEL_LINES = 16  #: If fewer lines are to be solved, they are solved in the calling process
+
+   def __init__(self, rowLengths: list, colLengths: list, noWorkers: int = 0, batchSize: int = 0):
+      """
+         Args:
+            rowLengths (list): List of the block lengths (tuple) of each row.
+            colLengths (list): List of the block lengths (tuple) of each column.
+            noWorkers (int): Number of processes. 0: number of CPUs.
+            batchSize (int): Number of lines per task. 0: the lines of a call are split evenly over the workers.
+      """
+      self.rowLengths = [tuple (lengths) for lengths in rowLengths]
+      self.colLengths = [tuple (lengths) for lengths in colLengths]
+      self.noWorkers = noWorkers or os.cpu_count () or 1  #: number of worker processes
+      self.batchSize = batchSize                          #: number of lines per task. 0: automatic
+      self._pool = None
+      self._localCache = NonoLineSolver.clLineSolveCache ()
+
+   def _GetPool (self):
+      # the pool is started with the first call
+      if self._pool is None:
+         self._pool = multiprocessing.Pool (self.noWorkers, initializer=_InitWorker,
+                                            initargs=(self.rowLengths, self.colLengths))
+      return self._pool
+
+   def SolveLines (self, lines: List[Tuple[bool, int, int, int]]) -> List[Optional[Tuple[int, int]]]:
+      """Solves all lines [(isRow, index, filledMask, crossMask), ...] in parallel.
+
+         Returns:
+            list: The results of NonoLineSolver.SolveLine in the order of lines: (forcedFilledMask, forcedCrossMask)
+                  or None, if the known fields of the line contradict its block lengths.
+      """
+      if len (lines) < self.MIN_PARALLEL_LINES or self.noWorkers < 2:
+         # the IPC overhead is larger than the gain
+         results = []
+         for isRow, i, filledMask, crossMask in lines:
+            lengths, noFields = (self.rowLengths [i], len (self.colLengths)) if isRow else (self.colLengths [i], len (self.rowLengths))
+            results.append (self._localCache.SolveLine (lengths, noFields, filledMask, crossMask))
+         return results
+
+      batchSize = self.batchSize or math.ceil (len (lines) / self.noWorkers)
+      batches = [lines [i:i+batchSize] for i in range (0, len (lines), batchSize)]
+      return [result for batchResults in self._GetPool ().map (_SolveBatch, batches) for result in batchResults]
+
+   def Close (self):
+      """Stops the worker processes. The pool is started again with the next call of SolveLines"""
+      if self._pool is not None:
+         self._pool.close ()
+         self._pool.join ()
+         self._pool = None
+
+   def __enter__ (self):
+      return self
+
+   def __exit__ (self, *exc):
+      self.Close ()
+#################################################################################
+# end of class clLinePool
+#################################################################################
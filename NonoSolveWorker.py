@@ -0,0 +1,81 @@
+import itertools
+import queue
+import threading
+from enum import Enum
+
+import NonogramAssist as nAss
+
+#: Enum for the kind of a message of the solve worker: 'PROGRESS DONE ERROR'
+EnSolveMsg = Enum ('EnSolveMsg', 'PROGRESS DONE ERROR')
+
+
+#################################################################################
+# definition of class clSolveWorker  #ff00ff
+#################################################################################
+class clSolveWorker:
+   """Runs NonoAssist.NonogramSolver in a background thread, so the pygame loop keeps its frame rate.
+
+   The fields found by the solver are sent through a queue. Each message is a tuple (kind, data) of EnSolveMsg:
+      PROGRESS: data is (newFields, noKnownFields, noFields). newFields is a dict {(col, row): state} of the fields
+                found since the last message
+      DONE:     data is (isSolved, isCancelled, isContradictory). The last message of the worker. isContradictory is
+                True, if the solver found that the nonogram has no solution (see NonoAssist.isContradictory)
+      ERROR:    data is the exception raised by the solver. The last message of the worker
+   The solver checks the cancel event before each line solve, so Cancel stops it nearly immediately.
+   """
+
+   def __init__(self, nonoAssist: nAss.NonoAssist):
+      self.nonoAssist = nonoAssist
+      self.messages = queue.Queue ()          #: the messages (kind, data) from the solver thread
+      self.cancelEvent = threading.Event ()   #: set by Cancel
+      self.noKnownFields = 0                  #: number of fields found so far. Updated by Poll
+      self.noFields = len (nonoAssist.rowBlocks) * len (nonoAssist.colBlocks)  #: number of fields of the nonogram
+      self._thread = threading.Thread (target=self._Run, name='NonogramSolver', daemon=True)
+
+   def Start (self):
+      self._thread.start ()
+      return self
+
+   def _Run (self):
+      self.nonoAssist.cancelEvent = self.cancelEvent
+      noSent = 0
+      isSolved = False
+      try:
+         for isSolved, solvedFields in self.nonoAssist.NonogramSolver ():
+            # the solver only adds fields to solvedFields, so the new fields are at the end of the dict
+            if len (solvedFields) > noSent:
+               newFields = dict (itertools.islice (solvedFields.items (), noSent, None))
+               noSent += len (newFields)
+               self.messages.put ((EnSolveMsg.PROGRESS, (newFields, noSent, self.noFields)))
+            if self.cancelEvent.is_set (): break
+         self.messages.put ((EnSolveMsg.DONE, (isSolved, self.cancelEvent.is_set (), self.nonoAssist.isContradictory)))
+      except nAss.SolverCancelled:
+         self.messages.put ((EnSolveMsg.DONE, (False, True, False)))
+      except Exception as e:
+         self.messages.put ((EnSolveMsg.ERROR, e))
+      finally:
+         self.nonoAssist.cancelEvent = None
+
+   def Poll (self):
+      """Returns the list of all messages received since the last call. Does not block"""
+      messages = []
+      while True:
+         try:
+            messages.append (self.messages.get_nowait ())
+         except queue.Empty:
+            break
+      for kind, data in messages:
+         if kind == EnSolveMsg.PROGRESS: self.noKnownFields = data [1]
+      return messages
+
+   def Cancel (self):
+      self.cancelEvent.set ()
+
+   def IsAlive (self):
+      return self._thread.is_alive ()
+
+   def Join (self, timeout = None):
+      self._thread.join (timeout)
+#################################################################################
+# end of class clSolveWorker
+#################################################################################
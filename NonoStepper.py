@@ -3,6 +3,7 @@ from typing import Union, List
 import math
 
 import NonoBlock
+import NonoLineSolver
 
 
 #################################################################################
@@ -80,6 +81,8 @@ class dcRowBlocks:
       """The length of the line""" 
       self.blocksInLine = []
       """A list of dcBlocks in the line"""
+      self.blockLengths = tuple (block.length for block in blockList)
+      """The lengths of all blocks in the line"""
       self.posOfAllBlocks = set ()
       """The null based index of all black fields that are currently set within the line."""
       self.numberPermutations: int
@@ -107,13 +110,14 @@ class dcRowBlocks:
       self.numberPermutations = self.CalcPermutationsOfRow ()
       
    def CalcPermutations (self, q, k):
+      # (k+q-1)! / (k! (q-1)!) calculated with integers only
       if q <= 1: return 1
-      fc = 1
-      for i in range (q, q+k): fc *= i
-      return int (fc/math.factorial (k))
+      return math.comb (q+k-1, k)
 
    def CalcPermutationsOfRow (self):
-         k = len (self.blocksInLine)
+         # a block of length 0 (empty line) is no block, an empty line has exactly one permutation
+         k = sum (1 for block in self.blocksInLine if block.length)
+         if k == 0: return 1
          q = self.noFields - k + 2 - len (self.posOfAllBlocks) 
          return self.CalcPermutations (q, k)
 
@@ -137,11 +141,8 @@ class dcRowBlocks:
          block.RemoveAllowedPositions (lockedPos)
 
    def EstimateReducedPermutations (self, crossedPos: set, filledPos: set):
-      # TODO: here we need an effective algorithm to estimate the numer of permutation
-      # with respect to already fix placed crosses and fix placed blocks.
-      k = len (self.blocksInLine)
-      q = self.noFields - k + 2 - len (self.posOfAllBlocks) - len (crossedPos)
-      return self.CalcPermutations (q, k)
+      """Returns the exact number of permutations with respect to already fix placed crosses and fix placed blocks"""
+      return NonoLineSolver.CountLinePermutations (self.blockLengths, self.noFields, MaskFromSet (filledPos), MaskFromSet (crossedPos))
 
 
    def NextStep (self):
@@ -176,6 +177,173 @@ class dcRowBlocks:
 #################################################################################
 
 
+#################################################################################
+# helper functions for bit masks  #00ff00
+#################################################################################
+def MaskFromSet (positions) -> int:
+   """Converts a set (or any iterable) of null based position indices into an int bit mask.
+   Bit i of the mask is set, if position i is part of the set.
+   """
+   mask = 0
+   for i in positions: mask |= 1 << i
+   return mask
+
+def SetFromMask (mask: int) -> set:
+   """Converts an int bit mask into the set of null based position indices of all set bits"""
+   positions = set ()
+   while mask:
+      lowBit = mask & -mask
+      positions.add (lowBit.bit_length () - 1)
+      mask ^= lowBit
+   return positions
+
+
+#################################################################################
+# definition of dataclass dcBitBlock  #ffff00
+#################################################################################
+class dcBitBlock:
+   """The same as dcBlock, but all positions are held as int bit masks (bit i corresponds to field i of the line)
+   instead of sets. 
+   """
+   __slots__ = ('minLeftPos', 'maxRightPos', 'length', 'runMask', 'allowedMask')
+
+   def __init__(self, minLeftPos, maxRightPos, length):
+      self.minLeftPos = minLeftPos      #: Minimal allowed left position of block regarding first blockelement
+      self.maxRightPos = maxRightPos    #: Maximal allowed right position of block regarding first blockelement
+      self.length = length              #: length of block
+      self.runMask = (1 << length) - 1  #: The mask of the block, if the first blockelement is at position 0
+      self.allowedMask = 0
+      """ All fields of the line which may be covered by the block. Bit i is set if field i is allowed"""
+
+   def SetAllowedPositionsOfBlock (self, allowedMask = 0, *, posMin = 0, posMax = 1):
+      if allowedMask: self.allowedMask = allowedMask
+      else: self.allowedMask = ((1 << (posMax + 1 + self.length - posMin)) - 1) << posMin
+
+   def RemoveAllowedPositions (self, posToRemove: Union[int, set]):
+      if isinstance (posToRemove, int): 
+         self.allowedMask &= ~(1 << posToRemove)
+      else:
+         self.allowedMask &= ~MaskFromSet (posToRemove)
+
+   def RemoveAllowedMask (self, maskToRemove: int):
+      self.allowedMask &= ~maskToRemove
+
+   def GetStartMasks (self):
+      """Returns a list of (start position, mask) for all positions the block can be placed on allowed fields"""
+      return [(s, self.runMask << s) for s in range (self.minLeftPos, self.maxRightPos + 1) 
+                                       if not (self.runMask << s) & ~self.allowedMask]
+#################################################################################
+# end of dataclass dcBitBlock
+#################################################################################
+
+
+#################################################################################
+# definition of dataclass dcRowBitBlocks  #ff00ff
+#################################################################################
+class dcRowBitBlocks (dcRowBlocks):
+   """A line stepper with the same ResetLeft/NextStep/posOfAllBlocks contract as dcRowBlocks. 
+   All blocks, the allowed positions and the positions of all blocks are held as int bit masks. The permutations
+   are produced by a generator (IterateMasks) which only visits placements on allowed fields: the first block
+   runs through a precalculated list of masks, the other blocks are only moved, if the first block
+   reached its most right position. Use posMask to get the current positions as bit mask, posOfAllBlocks is 
+   only calculated on request.
+   Per permutation NextStep is about 6 to 10 times faster than dcRowBlocks.NextStep, IterateMasks about 12 to 18
+   times. NextStep is bound by the cost of a Python method call per step, and reading posOfAllBlocks after each step
+   (a set built from the mask) leaves only a factor of about 1.3. So fast callers iterate IterateMasks and work with
+   the masks, as NonoAssist.FillLineWithPresetsBits does.
+   """
+
+   def __init__(self, blockList : List[NonoBlock.ClBlock], noFields: int, lockedPos = set()):
+      self.noFields = noFields 
+      """The length of the line""" 
+      self.fullMask = (1 << noFields) - 1
+      """The mask with all fields of the line set"""
+      self.blocksInLine = []
+      """A list of dcBitBlocks in the line"""
+      self.blockLengths = tuple (block.length for block in blockList)
+      """The lengths of all blocks in the line"""
+      self.posMask = 0
+      """Bit mask of all black fields that are currently set within the line."""
+      self.numberPermutations: int
+      """The overall number of permutations to distribute all blocks in the line"""
+      self.reqNoCrossPerLine: int
+      """Defines the required number of crosses which must be set in the line to complete it"""
+      self._placements = iter (())
+      """The generator of IterateMasks used by NextStep"""
+
+      # the most right start position of a block is given by the length of all blocks right to it
+      maxRightPos = noFields - sum (block.length + 1 for block in blockList) + 1
+      iPos = 0  # position index of  block in a row
+      for block in blockList:
+         tmp = dcBitBlock (iPos, maxRightPos, block.length)
+         self.blocksInLine.append (tmp)
+         self.posMask |= tmp.runMask << iPos
+         iPos += block.length + 1
+         maxRightPos += block.length + 1
+
+      self.leftPackedMask = self.posMask
+      """The mask of all blocks, if all of them are set to the left"""
+      self.reqNoCrossPerLine = noFields - self.posMask.bit_count ()
+
+      self.SetAllowedPosWithinLine (lockedPos)
+      self.numberPermutations = self.CalcPermutationsOfRow ()
+
+   @property
+   def posOfAllBlocks (self):
+      """The null based index of all black fields that are currently set within the line."""
+      return SetFromMask (self.posMask)
+
+   def UpdateAllowedPositions (self, lockedPos: Union[int, set]):
+      """Removes the locked positions from all blocks. lockedPos may be a set of positions or a bit mask"""
+      lockedMask = lockedPos if isinstance (lockedPos, int) else MaskFromSet (lockedPos)
+      for block in self.blocksInLine:
+         block.RemoveAllowedMask (lockedMask)
+
+   def _IterateOuterBlocks (self, j, limit, rest):
+      """Yields (mask of the blocks 1..j, most right allowed start of the first block) for all placements of the
+      blocks 1..j, where block j starts not right of limit. rest is the mask of the blocks right of block j.
+      """
+      predLength = self.blocksInLine [j-1].length
+      for s, mask in self._startMasks [j]:
+         if s > limit: return
+         if j == 1: yield rest | mask, s - predLength - 1
+         else: yield from self._IterateOuterBlocks (j-1, s - predLength - 1, rest | mask)
+
+   def IterateMasks (self):
+      """Generator yielding the bit masks of all permutations of the blocks within the line. The lowest block
+      is moved first (the same order as the permutations of dcRowBlocks.NextStep)"""
+      self._startMasks = [block.GetStartMasks () for block in self.blocksInLine]
+      # For each possible most right position of the first block we prepare the list of its masks
+      firstMasks = [[] for _ in range (self.noFields + 1)]
+      for s, mask in self._startMasks [0]:
+         for limit in range (s, self.noFields + 1): firstMasks [limit].append (mask)
+
+      if len (self.blocksInLine) == 1:
+         outerBlocks = [(0, self.blocksInLine [0].maxRightPos)]
+      else:
+         outerBlocks = self._IterateOuterBlocks (len (self.blocksInLine) - 1, self.blocksInLine [-1].maxRightPos, 0)
+      for rest, limit in outerBlocks:
+         if limit < 0: continue
+         for mask in firstMasks [limit]:
+            yield rest | mask
+
+   def NextStep (self):
+      """Takes the next permutation of IterateMasks. Returns False, if there is none. See the class docstring for the cost"""
+      posMask = next (self._placements, None)
+      if posMask is None: return False  # a move was not possible
+      self.posMask = posMask
+      return True
+
+   def ResetLeft (self):
+      # If there is no valid placement at all, we take the blocks set to the left
+      self._placements = self.IterateMasks ()
+      posMask = next (self._placements, None)
+      self.posMask = self.leftPackedMask if posMask is None else posMask
+
+#################################################################################
+# end of dataclass dcRowBitBlocks
+#################################################################################
+
 
 
 if __name__ == "__main__":
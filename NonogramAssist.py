@@ -1,44 +1,98 @@
 from  NonoBlock import ClBlock
-from NonoStepper import dcRowBlocks
+from NonoStepper import dcRowBlocks, dcRowBitBlocks, MaskFromSet, SetFromMask
+import NonoLineSolver
+from NonoBoardState import clBoardState
+import NonoParallel
+import NonoInstrument
 import time
-import math
+import heapq
+import itertools
+from enum import Enum
 
+#: Enum for the algorithm to find the common filled/crossed fields of a line: 
+#: 'STEPPER' set based permutations; 'BITSTEPPER' bit mask based permutations; 'DP' dynamic programming
+EnLineSolver = Enum ('EnLineSolver', 'STEPPER BITSTEPPER DP')
+
+
+class SolverCancelled (Exception):
+   """Raised by the solver, if NonoAssist.cancelEvent is set"""
 
-class NonoAssist:
-   DEBUGMODE=True
-   #DEBUGMODE=False
-   if DEBUGMODE:  import Sec2HumanReadable as s2h
 
+class NonoAssist:
    PERM_START_THRESHOLD = 0x1000
    MAX_PERM_START_THRESHOLD = 0x1_000_000
    THRESH_MULT = 8
 
-   def __init__(self, rowBlocks: list,  colBlocks: list):
+   def __init__(self, rowBlocks: list,  colBlocks: list, *, lineSolver = EnLineSolver.DP, useProbing = True, noWorkers = 0):
       self.rowBlocks = rowBlocks
       self.colBlocks = colBlocks
-
-      self.stepperRows = [dcRowBlocks (blocks, len (colBlocks)) for blocks in rowBlocks]
-      self.stepperCols = [dcRowBlocks (blocks, len (rowBlocks)) for blocks in colBlocks]
-
-
-
-   def CalculateNumberPermutationsOfNonogram (self, useRows = True):
+      self.lineSolver = lineSolver
+      self.useProbing = useProbing  #: If True, NonogramSolver probes the fields, which cannot be found by line solving
+      self.noLineSolves = 0         #: The number of line solves. Reset by NonogramSolver
+      self.noPermutations = 0       #: The number of permutations run through by the stepper line solvers. Reset by NonogramSolver
+      self.isContradictory = False  #: True, if NonogramSolver found a contradiction: the nonogram has no solution
+      self.lineCache = NonoLineSolver.clLineSolveCache ()  #: LRU cache in front of the DP line solver
+      self.noWorkers = noWorkers    #: If > 1, the DP line solves of a sweep are done by a pool of noWorkers processes
+      self.linePool = None          #: The NonoParallel.clLinePool. Started with the first parallel sweep
+      self.instrument = NonoInstrument.clInstrument ()  #: Delivers the events of the solver to the registered sinks
+      self.cancelEvent = None       #: A threading.Event. If set, the running solver raises SolverCancelled at the next line solve
+
+      # The bit mask based stepper is much faster, the set based one is kept for comparison.
+      # The DP line solver does not need the stepper, but we keep it for the number of permutations
+      stepperClass = dcRowBlocks if lineSolver == EnLineSolver.STEPPER else dcRowBitBlocks
+      self.stepperRows = [stepperClass (blocks, len (colBlocks)) for blocks in rowBlocks]
+      self.stepperCols = [stepperClass (blocks, len (rowBlocks)) for blocks in colBlocks]
+
+
+
+   def GetLinePool (self):
+      """Returns the process pool for parallel line solving. The pool is kept until Close is called"""
+      if self.linePool is None:
+         self.linePool = NonoParallel.clLinePool ([s.blockLengths for s in self.stepperRows],
+                                                  [s.blockLengths for s in self.stepperCols], self.noWorkers)
+      return self.linePool
+
+   def UseParallel (self):
+      return self.noWorkers > 1 and self.lineSolver == EnLineSolver.DP
+
+   def Close (self):
+      """Stops the worker processes of the parallel line solving"""
+      if self.linePool is not None:
+         self.linePool.Close ()
+         self.linePool = None
+
+   def CalculateNumberPermutationsOfNonogram (self, useRows = True, procField: dict = None, *, logScale = False):
+      """Returns the number of permutations of all rows (columns) of the nonogram. If procField is given, only the
+      permutations matching the already processed fields are counted. With logScale the binary logarithm is returned.
+      procField may be a dict as used by FillFieldsWithPresets or a NonoBoardState.clBoardState.
+      """
       # wether we want to use the rows or the columns for calculating the permutation we define a 
       line = self.stepperRows if useRows else self.stepperCols 
-         
-      noPossi = 1
-      for stepper in line:
-         noPossi *= stepper.numberPermutations
+      board = self.GetBoardState (procField if procField else {})
+
+      noPossi = 0.0 if logScale else 1
+      for i, stepper in enumerate (line):
+         filledMask, crossMask = board.LineMasks (useRows, i)
+         if logScale:
+            noPossi += NonoLineSolver.LogCountLinePermutations (stepper.blockLengths, stepper.noFields, filledMask, crossMask)
+         elif filledMask or crossMask:
+            noPossi *= NonoLineSolver.CountLinePermutations (stepper.blockLengths, stepper.noFields, filledMask, crossMask)
+         else:
+            noPossi *= stepper.numberPermutations
       return noPossi
 
+   def GetBoardState (self, procField):
+      """Returns a board with line views (LineMasks, LineSets) for procField. procField may be a dict {(col, row): state}, 
+      a dict of dicts {(col, row): {'state': state, ...}}, a NonoBoardState.clBoardState or a NonoBoard.clNonoBoard.
+      """
+      if not isinstance (procField, dict): return procField
+      return clBoardState.FromProcessedFields (len (self.rowBlocks), len (self.colBlocks), procField)
 
-   def PrintPermutationsOfRowsAndCols (self):
-      if self.DEBUGMODE: 
-         for i, stepper in enumerate (self.stepperRows):
-            print (f'{i+1:>3}. row has {stepper.numberPermutations:>10} permutations')
-
-         for i, stepper in enumerate (self.stepperCols):
-            print (f'{i+1:>3}. columns has {stepper.numberPermutations:>10} permutations')
+   def EmitPermutationsOfRowsAndCols (self):
+      """Emits the number of permutations of each row and column as 'permutations' event"""
+      if self.instrument:
+         self.instrument.Emit ('permutations', rows=[s.numberPermutations for s in self.stepperRows],
+                               cols=[s.numberPermutations for s in self.stepperCols])
 
 
    def GetOverlappingFields (self, blocks, rowLen):
@@ -50,7 +104,8 @@ class NonoAssist:
          for i in range (b.length):
             blockSet.add (p+i+1)
          blockSetsLeft.append (blockSet)  
-         p = p + i + 2
+         # a block of length 0 (empty line) has no fields and no cross
+         p = p + b.length + 1 if b.length else p
             
       p = -1  
       blockSetsRight = []  
@@ -61,7 +116,7 @@ class NonoAssist:
             blockSet.add (rowLen - 1 - (p+i+1))
          # we must also reverse the array of sets
          blockSetsRight.insert (0, blockSet)   
-         p = p + i + 2
+         p = p + b.length + 1 if b.length else p
 
       # Now we take the intersection of each left and right set
       interSets = []
@@ -93,7 +148,32 @@ class NonoAssist:
       return dict ([(pos, ClBlock.FILLED) for pos in data])
 
 
+   def FillLineWithPresetsBits (self, stepper: dcRowBitBlocks, crossIndis: set, filledIndis: set):
+      # The same as FillLineWithPresets, but all permutations are checked as bit masks
+      filledMask = MaskFromSet (filledIndis)
+      crossMask = MaskFromSet (crossIndis)
+      commonFilledMask = commonCrossMask = stepper.fullMask
+      noPerms = 0
+      for noPerms, posMask in enumerate (stepper.IterateMasks (), 1):
+         # valid, if all filled fields are covered by blocks and no block covers a cross
+         if posMask & filledMask == filledMask and not posMask & crossMask:
+            commonFilledMask &= posMask
+            commonCrossMask &= ~posMask
+
+      self.noPermutations += noPerms
+      return SetFromMask (commonFilledMask), SetFromMask (commonCrossMask)
+
+   def FillLineWithPresetsDP (self, stepper: dcRowBlocks, crossIndis: set, filledIndis: set):
+      # The same as FillLineWithPresets, but without running through the permutations.
+      # If the known fields contradict the block lengths nothing can be filled and we return empty sets
+      result = self.lineCache.SolveLine (stepper.blockLengths, stepper.noFields, MaskFromSet (filledIndis), MaskFromSet (crossIndis))
+      if result is None: return set (), set ()
+      return SetFromMask (result [0]), SetFromMask (result [1])
+
    def FillLineWithPresets (self, stepper:  dcRowBlocks, crossIndis: set, filledIndis: set):
+      if self.lineSolver == EnLineSolver.DP: return self.FillLineWithPresetsDP (stepper, crossIndis, filledIndis)
+      if isinstance (stepper, dcRowBitBlocks): return self.FillLineWithPresetsBits (stepper, crossIndis, filledIndis)
+
       # all position indices are possible
       allPossiblePos = set ([i for i in range (stepper.noFields)])
       commonFilledPos = allPossiblePos.copy ()
@@ -107,141 +187,388 @@ class NonoAssist:
          # we get the positions of the crosses , when taking the difference of all possible positions and the current filled ones
          commonCrossPos  = (allPossiblePos - stepper.posOfAllBlocks) & commonCrossPos
 
+      noPerms = 1
       while stepper.NextStep ():
+         noPerms += 1
          posOfAllCross = allPossiblePos - stepper.posOfAllBlocks
          if filledIndis.issubset (stepper.posOfAllBlocks) and crossIndis.issubset (posOfAllCross):
             commonFilledPos = stepper.posOfAllBlocks & commonFilledPos  # intersection of both sets
             commonCrossPos  = posOfAllCross & commonCrossPos
 
+      self.noPermutations += noPerms
       return commonFilledPos, commonCrossPos
 
 
 
-   def FillFieldsWithPresets (self, procField: dict, useRows = True, *, threshold = None):
+   def FillFieldsWithPresets (self, procField, useRows = True, *, threshold = None):
       result = {}
       # wether we want to use the rows or the columns for calculating the permutation we define a 
       lineStepper = self.stepperRows if useRows else self.stepperCols 
+      # with the board state we get the known fields of a line without running through all processed fields
+      board = self.GetBoardState (procField)
       if not threshold: threshold = self.PERM_START_THRESHOLD
+
+      instrumented = bool (self.instrument)
+      def AddToResult (iToTake, commonFilledPos, commonCrossPos, crossIndis, filledIndis):
+         # the member of the returned sets are the column (row) position where to fill a cross / block
+         # The already known blocks and crosses are also part of the returned sets. These member can be deleted
+         for i in (commonFilledPos - filledIndis): 
+            pos = (i, iToTake) if useRows else (iToTake, i)
+            result [pos] = ClBlock.FILLED
+         for i in (commonCrossPos - crossIndis): 
+            pos = (i, iToTake) if useRows else (iToTake, i)
+            result [pos] = ClBlock.CROSS
+
+      # In parallel mode the lines are not solved in the loop, but collected and solved at once by the process pool
+      deferred = [] if self.UseParallel () else None
       while True:
          for iToTake, stepper in enumerate (lineStepper):
             # Get a set of indices, where a cross and a bock is set, for the line to be under investigation
-            crossIndis = set ()
-            filledIndis = set ()
-            for (col, row), attr in procField.items ():
-               i = row if useRows else col
-               j = col if useRows else row
-               if i != iToTake: continue  # we only get entries in our row (col) we want to analyse. 
-               # nb can be a dict of dict, or just a dict of state values:
-               if  isinstance (attr, dict): state = attr ['state']
-               else: state = attr
-               # the column j (row j) is the index of the row i (col i) block array
-               if state == ClBlock.FILLED: filledIndis.add (j)
-               elif state == ClBlock.CROSS: crossIndis.add (j)
-               # if attr ['state'] == ClBlock.FILLED: filledIndis.add (j)
-               # elif attr ['state'] == ClBlock.CROSS: crossIndis.add (j)
+            crossIndis, filledIndis = board.LineSets (useRows, iToTake)
 
             # if no crosses and no filled blocks are in the current row/col,
             # we will find no further blocks and crosses and can continue
             if not crossIndis and not filledIndis: continue  
-            stepper.UpdateAllowedPositions (crossIndis)
             if len (crossIndis) == stepper.reqNoCrossPerLine and len (filledIndis) == len (stepper.blocksInLine): continue
-            if stepper.EstimateReducedPermutations (crossIndis, filledIndis) > threshold: continue
+            # The DP line solver is fast for each line, there is no need to skip lines with many permutations
+            if self.lineSolver != EnLineSolver.DP:
+               stepper.SetAllowedPosWithinLine (crossIndis)
+               if stepper.EstimateReducedPermutations (crossIndis, filledIndis) > threshold: continue
+            if deferred is not None:
+               deferred.append ((iToTake, crossIndis, filledIndis))
+               continue
+            if instrumented: startTime, noPerms, noHits = time.perf_counter (), self.noPermutations, self.lineCache.hits
             commonFilledPos, commonCrossPos = self.FillLineWithPresets (stepper, crossIndis, filledIndis)
-            # the member of the returned sets are the column (row) position where to fill a cross / block
-            # The already known blocks and crosses are also part of the returned sets. These member can be deleted
-            for i in (commonFilledPos - filledIndis): 
-               pos = (i, iToTake) if useRows else (iToTake, i)
-               result [pos] = ClBlock.FILLED
-            for i in (commonCrossPos - crossIndis): 
-               pos = (i, iToTake) if useRows else (iToTake, i)
-               result [pos] = ClBlock.CROSS
-
-         if len (result) > 0 or threshold >= self.MAX_PERM_START_THRESHOLD: break
+            self.noLineSolves += 1
+            AddToResult (iToTake, commonFilledPos, commonCrossPos, crossIndis, filledIndis)
+            if instrumented:
+               self.instrument.Emit ('line', isRow=useRows, index=iToTake, time=time.perf_counter () - startTime, 
+                  newCells=len (commonFilledPos - filledIndis) + len (commonCrossPos - crossIndis), 
+                  permutations=self.noPermutations - noPerms, cached=self.lineCache.hits > noHits,
+                  threshold=None if self.lineSolver == EnLineSolver.DP else threshold, contradiction=False)
+
+         if deferred:
+            tasks = [(useRows, i, MaskFromSet (filledIndis), MaskFromSet (crossIndis)) for i, crossIndis, filledIndis in deferred]
+            self.noLineSolves += len (tasks)
+            for (iToTake, crossIndis, filledIndis), masks in zip (deferred, self.GetLinePool ().SolveLines (tasks)):
+               # If the known fields contradict the block lengths nothing can be filled
+               if masks is not None: 
+                  AddToResult (iToTake, SetFromMask (masks [0]), SetFromMask (masks [1]), crossIndis, filledIndis)
+               if instrumented: self.EmitLineEvent (useRows, iToTake, MaskFromSet (filledIndis), MaskFromSet (crossIndis), masks, None)
+
+         if len (result) > 0 or threshold >= self.MAX_PERM_START_THRESHOLD or self.lineSolver == EnLineSolver.DP: break
          else: threshold *= self.THRESH_MULT
       return result, threshold
 
-   def NonogramSolver (self):
-      startTime = time.time ()
-      nonoSize = len (self.rowBlocks) * len (self.colBlocks)
-      rowThreshold = colThreshold = self.PERM_START_THRESHOLD
+   def EmitLineEvent (self, isRow: bool, i: int, filledMask: int, crossMask: int, result, lineTime, permutations = 0, cached = False):
+      """Emits the 'line' event of a line solve with the known masks of the line and the result of SolveLineMasks"""
+      newCells = 0 if result is None else ((result [0] & ~filledMask) | (result [1] & ~crossMask)).bit_count ()
+      self.instrument.Emit ('line', isRow=isRow, index=i, time=lineTime, newCells=newCells, permutations=permutations,
+                            cached=cached, threshold=None, contradiction=result is None)
+
+   def SolveLineMasks (self, stepper: dcRowBlocks, filledMask: int, crossMask: int):
+      """Returns the masks (commonFilledMask, commonCrossMask) of a line using the selected line solver. 
+      The known fields are part of the masks. Returns None if the known fields contradict the block lengths.
+      """
+      if self.lineSolver == EnLineSolver.DP:
+         return self.lineCache.SolveLine (stepper.blockLengths, stepper.noFields, filledMask, crossMask)
+      crossIndis = SetFromMask (crossMask)
+      # The steppers are shared by all boards (probes and branches of the search use copies of the board), so the 
+      # allowed positions are set from the crosses of this board. Only removing positions would keep the crosses 
+      # of other boards
+      stepper.SetAllowedPosWithinLine (crossIndis)
+      commonFilledPos, commonCrossPos = self.FillLineWithPresets (stepper, crossIndis, SetFromMask (filledMask))
+      # If no permutation was valid, all fields are in both sets
+      if commonFilledPos & commonCrossPos: return None
+      return MaskFromSet (commonFilledPos), MaskFromSet (commonCrossPos)
+
+   def PropagateLines (self, board: clBoardState, lines = None, *, yieldEvery = 0):
+      """Solves rows and columns until no further field can be found. New fields are set in board.
+
+         Instead of full passes over all rows and columns we keep a queue of lines, whose fields changed since 
+         their last solve. Each new field only puts the crossing line into the queue. The line with the most 
+         new fields is solved first. The fixed point is reached when the queue is empty.
+         This is a generator, which yields the number of line solves every yieldEvery line solves.
+         The number of line solves is counted in self.noLineSolves.
+
+         Args:
+            board (clBoardState): The state of all known fields. Will be updated.
+            lines (list): List of (isRow, index) of the lines to start with. None: all lines.
+            yieldEvery (int): Number of line solves between two yields. 0: never yield. 
+
+         Returns:
+            bool: The generator returns False, if a line contradicts its block lengths, True otherwise
+      """
+      steppers = {True: self.stepperRows, False: self.stepperCols}
+
+      # The queue is a heap of (-number of new fields, counter, isRow, index). pending holds the current number
+      # of new fields of each queued line. Entries with an outdated number are skipped.
+      pending = {}
+      heap = []
+      counter = itertools.count ()
+      def Enqueue (isRow, i, newFields):
+         prio = pending.get ((isRow, i), 0) + newFields
+         pending [(isRow, i)] = prio
+         heapq.heappush (heap, (-prio, next (counter), isRow, i))
+
+      if lines is None:
+         lines = [(isRow, i) for isRow in (True, False) for i in range (board.NoLines (isRow))]
+      for isRow, i in lines:
+         filledMask, crossMask = board.LineMasks (isRow, i)
+         Enqueue (isRow, i, (filledMask | crossMask).bit_count ())
+
+      instrumented = bool (self.instrument)
+      cancelEvent = self.cancelEvent
+      while heap:
+         negPrio, _, isRow, i = heapq.heappop (heap)
+         if pending.get ((isRow, i)) != -negPrio: continue
+         del pending [(isRow, i)]
+         # a cancelled probe must not be taken as consistent, so we cannot just return
+         if cancelEvent is not None and cancelEvent.is_set (): raise SolverCancelled ()
+
+         stepper = steppers [isRow][i]
+         filledMask, crossMask = board.LineMasks (isRow, i)
+         if instrumented: startTime, noPerms, noHits = time.perf_counter (), self.noPermutations, self.lineCache.hits
+         result = self.SolveLineMasks (stepper, filledMask, crossMask)
+         self.noLineSolves += 1
+         if instrumented:
+            self.EmitLineEvent (isRow, i, filledMask, crossMask, result, time.perf_counter () - startTime, 
+                                self.noPermutations - noPerms, self.lineCache.hits > noHits)
+         if result is None: return False
+         # the new fields are set on the board and the crossing lines must be solved again
+         for newMask, state in ((result [0] & ~filledMask, ClBlock.FILLED), (result [1] & ~crossMask, ClBlock.CROSS)):
+            for j in SetFromMask (newMask):
+               if isRow: board.Set (j, i, state)
+               else: board.Set (i, j, state)
+               Enqueue (not isRow, j, 1)
+
+         if yieldEvery and self.noLineSolves % yieldEvery == 0: yield self.noLineSolves
+      return True
+
+   def PropagateSweeps (self, board: clBoardState, lines = None, *, yieldEvery = 0):
+      """The same as PropagateLines, but for the parallel mode. 
+
+         Instead of solving one line after the other, all changed rows are solved at once by the process pool, then
+         all changed columns, and so on. Each sweep only depends on the board before the sweep, so the lines of a 
+         sweep are independent. The fixed point is reached, when a sweep finds no new fields.
+         This is a generator, which yields after a sweep, if at least yieldEvery line solves were done since the last yield.
+
+         Args:
+            board (clBoardState): The state of all known fields. Will be updated.
+            lines (list): List of (isRow, index) of the lines to start with. None: all lines.
+            yieldEvery (int): Number of line solves between two yields. 0: never yield. 
+
+         Returns:
+            bool: The generator returns False, if a line contradicts its block lengths, True otherwise
+      """
+      if lines is None:
+         lines = [(isRow, i) for isRow in (True, False) for i in range (board.NoLines (isRow))]
+      changed = {True: set (), False: set ()}  # indices of the rows and the columns to be solved
+      for isRow, i in lines:
+         changed [isRow].add (i)
+
+      pool = self.GetLinePool ()
+      instrumented = bool (self.instrument)
+      lastYield = self.noLineSolves
+      isRow = True
+      while changed [True] or changed [False]:
+         if self.cancelEvent is not None and self.cancelEvent.is_set (): raise SolverCancelled ()
+         indices = sorted (changed [isRow])
+         changed [isRow] = set ()
+         tasks = [(isRow, i, *board.LineMasks (isRow, i)) for i in indices]
+         for (_, i, filledMask, crossMask), result in zip (tasks, pool.SolveLines (tasks)):
+            # the time of a single line is not known, the lines are solved by the pool
+            if instrumented: self.EmitLineEvent (isRow, i, filledMask, crossMask, result, None)
+            if result is None: return False
+            # the new fields are set on the board and the crossing lines must be solved in the next sweep
+            for newMask, state in ((result [0] & ~filledMask, ClBlock.FILLED), (result [1] & ~crossMask, ClBlock.CROSS)):
+               for j in SetFromMask (newMask):
+                  if isRow: board.Set (j, i, state)
+                  else: board.Set (i, j, state)
+                  changed [not isRow].add (j)
+         self.noLineSolves += len (tasks)
+         isRow = not isRow
+
+         if yieldEvery and self.noLineSolves - lastYield >= yieldEvery: 
+            lastYield = self.noLineSolves
+            yield self.noLineSolves
+      return True
+
+   def Propagate (self, board: clBoardState, lines = None):
+      """The same as PropagateLines, but without yielding. Returns False, if a contradiction was found"""
+      propagation = self.PropagateLines (board, lines)
+      try: 
+         next (propagation)
+      except StopIteration as stop: 
+         return stop.value
+      return True  # never reached, PropagateLines without yieldEvery does not yield
+
+   def GetProbeOrder (self, board: clBoardState):
+      """Returns all unknown fields ordered by the expected information of a probe. Fields within rows and
+      columns with many known fields are probed first, because a probe there most likely leads to a contradiction.
+      """
+      knownInRow = [(board.rowFilled [row] | board.rowCross [row]).bit_count () for row in range (board.noRows)]
+      knownInCol = [(board.colFilled [col] | board.colCross [col]).bit_count () for col in range (board.noCols)]
+      unknown = [(col, row) for row in range (board.noRows) for col in range (board.noCols) 
+                              if board.grid [row][col] == ClBlock.UNKNOWN]
+      return sorted (unknown, key = lambda pos: knownInCol [pos [0]] + knownInRow [pos [1]], reverse = True)
+
+   def ProbeFields (self, board: clBoardState):
+      """Solves fields which cannot be found by line solving. 
+
+         Each unknown field is set tentatively to FILLED and to CROSS and the propagation is run on a copy of the board.
+         If one of both leads to a contradiction, the field gets the opposite state. If both are consistent, all fields
+         found by both probes are set. The new fields of consistent probes are cached: a field/state found by a probe
+         leads to a subset of the same fields, so probing it is skipped until the board changes.
+         This is a generator, which yields each time new fields were set on the board.
+
+         Args:
+            board (clBoardState): The state of all known fields after propagation. Will be updated.
+
+         Returns:
+            bool: The generator returns False, if the nonogram contradicts itself, True otherwise
+      """
+      while not board.IsComplete ():
+         dominated = set ()  # cache of all (pos, state) found by consistent probes on the current board
+         newFields = {}
+         for pos in self.GetProbeOrder (board):
+            results = {}
+            for state in (ClBlock.FILLED, ClBlock.CROSS):
+               # the probe is dominated by a consistent probe, which found this field/state
+               if (pos, state) in dominated: continue
+               probe = board.Copy ()
+               probe.Set (*pos, state)
+               if not self.Propagate (probe, [(True, pos [1]), (False, pos [0])]):
+                  # contradiction: the field must have the opposite state
+                  newFields = {pos: ClBlock.CROSS if state == ClBlock.FILLED else ClBlock.FILLED}
+                  break
+               results [state] = {p: s for p, s in probe.knownFields.items () if p not in board.knownFields}
+               dominated.update (results [state].items ())
+
+            if not newFields and len (results) == 2:
+               # fields found by both probes are set in any case
+               found = results [ClBlock.FILLED]
+               newFields = {p: s for p, s in results [ClBlock.CROSS].items () if found.get (p) == s}
+            if newFields: break
+
+         if not newFields: return True   # no probe gives new fields, we are stuck
+         for (col, row), state in newFields.items ():
+            board.Set (col, row, state)
+         lines = {(True, row) for _, row in newFields} | {(False, col) for col, _ in newFields}
+         if not self.Propagate (board, list (lines)): return False
+         yield len (board.knownFields)
+      return True
+
+   def GetBranchField (self, board: clBoardState):
+      """Returns an unknown field of the most constrained line: the incomplete line with the fewest unknown fields.
+      Within the line the field whose crossing line has the most known fields is taken.
+      """
+      bestUnknown, bestLine = None, None
+      for isRow in (True, False):
+         fullMask = (1 << board.LineLength (isRow)) - 1
+         for i in range (board.NoLines (isRow)):
+            filledMask, crossMask = board.LineMasks (isRow, i)
+            noUnknown = (fullMask & ~(filledMask | crossMask)).bit_count ()
+            if noUnknown and (bestUnknown is None or noUnknown < bestUnknown): bestUnknown, bestLine = noUnknown, (isRow, i)
+
+      isRow, i = bestLine
+      filledMask, crossMask = board.LineMasks (isRow, i)
+      unknown = SetFromMask (~(filledMask | crossMask) & ((1 << board.LineLength (isRow)) - 1))
+      j = max (unknown, key = lambda j: (board.LineMasks (not isRow, j)[0] | board.LineMasks (not isRow, j)[1]).bit_count ())
+      return (j, i) if isRow else (i, j)
+
+   def EnumerateSolutions (self, maxSolutions = 2, procField = None):
+      """Finds up to maxSolutions solutions of the nonogram by a depth first search.
+
+         At each node of the search the rows and columns are propagated. If the board is not complete, we branch on
+         an unknown field of the most constrained line (see GetBranchField), first with FILLED, then with CROSS.
+
+         Args:
+            maxSolutions (int): The search stops, if this number of solutions was found.
+            procField: Already known fields as used by FillFieldsWithPresets. None: start with an empty board.
+
+         Returns:
+            list: List of the solutions. Each solution is a dict {(col, row): state} of all fields.
+      """
+      solutions = []
+      board = clBoardState (len (self.rowBlocks), len (self.colBlocks)) if procField is None \
+                           else self.GetBoardState (procField).Copy ()
+      # stack of (board, lines to propagate). None: all lines
+      stack = [(board, None)]
+      while stack and len (solutions) < maxSolutions:
+         board, lines = stack.pop ()
+         if not self.Propagate (board, lines): continue
+         if board.IsComplete ():
+            solutions.append (board.knownFields)
+            continue
+         col, row = self.GetBranchField (board)
+         # CROSS is pushed first, so FILLED is searched first
+         for state in (ClBlock.CROSS, ClBlock.FILLED):
+            child = board.Copy ()
+            child.Set (col, row, state)
+            stack.append ((child, [(True, row), (False, col)]))
+      return solutions
 
-      solvedFields = {}  # corresponds to the processedFields dict in Nonogram_Game.py, without 'pos' and without 'mode'
-      autoFillData = self.FillObviousFields ()
-      # the obvious fields are all filled blocks
-      for pos in autoFillData:
-         solvedFields [pos] =  ClBlock.FILLED
-
-      if self.DEBUGMODE: 
-         print (f'{self.s2h.human_time_duration(time.time ()-startTime)} for filling overlapped; {len (solvedFields)} of {nonoSize}') 
-      # the nonogram is solved, when the all fields are processed: length of solvedFields == requiredLength
-      requiredLength = len (self.rowBlocks) * len (self.colBlocks)
-      # now we call alternating FillFieldsWithPresets, once for the rows and once for the coulumns
-      startLen = len (solvedFields)
-      while True:
-         # get new processed fields using all rows
-         autoFillData, rowThreshold = self.FillFieldsWithPresets (solvedFields, threshold=rowThreshold)
-         solvedFields.update (autoFillData)
-         if self.DEBUGMODE: 
-            print (f'{self.s2h.human_time_duration(time.time ()-startTime)} for filling rows; {len (solvedFields)} of {nonoSize}; Threshold: {rowThreshold:>7}') 
-
-         if len (solvedFields) == requiredLength: break
-
-         # now get new processed fields using all columns
-         autoFillData, colThreshold  = self.FillFieldsWithPresets (solvedFields, False, threshold=colThreshold)
-         solvedFields.update (autoFillData)
-         if self.DEBUGMODE: 
-            print (f'{self.s2h.human_time_duration(time.time ()-startTime)} for filling cols; {len (solvedFields)} of {nonoSize}; Threshold: {colThreshold:>7}') 
-         if len (solvedFields) == requiredLength: break
-         # It may happen, that the nonogram connot be solved. This happens, if after a complete loop the length of the
-         # solvedFields has not changed. Then we must exit from the loop
-         if len (solvedFields) == startLen: break
-         startLen = len (solvedFields)
-         yield (solvedFields == requiredLength), solvedFields
-
-      print (time.time ()-startTime)
-      yield len (solvedFields) == requiredLength, solvedFields
-
-   def Old_NonogramSolver (self):
-      startTime = time.time ()
+   def NonogramSolver (self):
+      """Solves the nonogram. This is a generator, which yields (isSolved, solvedFields) while solving and once more
+      at the end. solvedFields is the dict {(col, row): state} of the known fields.
+      If the clues contradict each other, the solver stops, the last isSolved is False and isContradictory is set.
+      """
+      startTime = time.perf_counter ()
       nonoSize = len (self.rowBlocks) * len (self.colBlocks)
-      rowThreshold = colThreshold = self.PERM_START_THRESHOLD
+      self.noLineSolves = self.noPermutations = 0
+      self.isContradictory = False
+      instrument = self.instrument
+
+      # the known fields of the board state are the solved fields as {(col, row): state}
+      board = clBoardState (len (self.rowBlocks), len (self.colBlocks))
+      solvedFields = board.knownFields
+      def EmitSweep (phase):
+         if instrument: 
+            instrument.Emit ('sweep', phase=phase, lineSolves=self.noLineSolves, knownFields=len (solvedFields), 
+                             noFields=nonoSize, elapsed=time.perf_counter () - startTime)
 
-      solvedFields = {}  # corresponds to the processedFields dict in Nonogram_Game.py, without 'pos' and without 'mode'
-      autoFillData = self.FillObviousFields ()
       # the obvious fields are all filled blocks
-      for pos in autoFillData:
-         solvedFields [pos] =  ClBlock.FILLED
-
-      if self.DEBUGMODE: 
-         print (f'{self.s2h.human_time_duration(time.time ()-startTime)} for filling overlapped; {len (solvedFields)} of {nonoSize}') 
-      # the nonogram is solved, when the all fields are processed: length of solvedFields == requiredLength
-      requiredLength = len (self.rowBlocks) * len (self.colBlocks)
-      # now we call alternating FillFieldsWithPresets, once for the rows and once for the coulumns
-      startLen = len (solvedFields)
-      while True:
-         # get new processed fields using all rows
-         autoFillData, rowThreshold = self.FillFieldsWithPresets (solvedFields, threshold=rowThreshold)
-         solvedFields.update (autoFillData)
-         if self.DEBUGMODE: 
-            print (f'{self.s2h.human_time_duration(time.time ()-startTime)}\
-                for filling rows; {len (solvedFields)} of {nonoSize}; Threshold: {rowThreshold:>7}') 
-
-         if len (solvedFields) == requiredLength: break
-
-         # now get new processed fields using all columns
-         autoFillData, colThreshold  = self.FillFieldsWithPresets (solvedFields, False, threshold=colThreshold)
-         solvedFields.update (autoFillData)
-         if self.DEBUGMODE: 
-            print (f'{self.s2h.human_time_duration(time.time ()-startTime)}\
-                for filling cols; {len (solvedFields)} of {nonoSize}; Threshold: {colThreshold:>7}') 
-         if len (solvedFields) == requiredLength: break
-         # It may happen, that the nonogram connot be solved. This happens, if after a complete loop the length of the
-         # solvedFields has not changed. Then we must exit from the loop
-         if len (solvedFields) == startLen: break
-         startLen = len (solvedFields)
-
-      print (time.time ()-startTime)
-      return len (solvedFields) == requiredLength, solvedFields
+      with instrument.Phase ('FillObviousFields'):
+         for pos in self.FillObviousFields ():
+            board.Set (*pos, ClBlock.FILLED)
+      EmitSweep ('FillObviousFields')
+
+      def RunPhase (phase, steps):
+         # yields the progress of the generator steps and returns its return value (False on a contradiction)
+         with instrument.Phase (phase):
+            while True:
+               try:
+                  next (steps)
+               except StopIteration as stop:
+                  return stop.value
+               EmitSweep (phase)
+               yield board.IsComplete (), solvedFields
+
+      # we yield after as many line solves as the nonogram has rows and columns. The time of the phases includes
+      # the time of the caller between the yields
+      propagate = self.PropagateSweeps if self.UseParallel () else self.PropagateLines
+      isConsistent = yield from RunPhase ('Propagate', propagate (board, yieldEvery=len (self.rowBlocks) + len (self.colBlocks)))
+
+      # if line solving is stuck, we probe the remaining fields
+      if isConsistent and self.useProbing and not board.IsComplete ():
+         isConsistent = yield from RunPhase ('Probe', self.ProbeFields (board))
+
+      # on a contradiction the known fields are not part of a solution
+      self.isContradictory = not isConsistent
+      isSolved = isConsistent and board.IsComplete ()
+      if instrument: 
+         instrument.Emit ('solve', solved=isSolved, contradiction=self.isContradictory, lineSolves=self.noLineSolves, 
+                          permutations=self.noPermutations, knownFields=len (solvedFields), noFields=nonoSize, 
+                          elapsed=time.perf_counter () - startTime)
+      yield isSolved, solvedFields
+
+
+def verify_unique (rowBlocks: list, colBlocks: list):
+   """Returns True, if the nonogram given by the lists of NonoBlock.ClBlock lists has exactly one solution.
+   The search stops as soon as a second solution is found.
+   """
+   return len (NonoAssist (rowBlocks, colBlocks).EnumerateSolutions (2)) == 1
 
                
 if __name__ == "__main__":
@@ -250,4 +577,4 @@ if __name__ == "__main__":
    ret, rB, cB, pF = noG.ReadNonogramFromFile ('Nono_Vogel.nos')
 
    
-   pass
\ No newline at end of file
+   pass
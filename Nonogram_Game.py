@@ -7,6 +7,7 @@ import os
 import pathlib
 from tkinter import N
 from typing import Any
+import numpy as np
 import pygame as pg
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtGui import *
@@ -14,10 +15,16 @@ import QtDialogs
 from enum import Enum
 #from regex import F
 import NonoBlock
+import NonoBoard
+import NonoCompletion
+import NonoFile
+import NonoInstrument
 import pgButton
+from pgFontCache import fontCache
 import UndoRedo
 import ConfigProperties as cfg
 import NonogramAssist as nAss
+import NonoSolveWorker
 
 
 
@@ -27,8 +34,17 @@ class NonogramGame:
    WHITE = pg.Color ('white')
    RED = pg.Color ('red')
    NAVY = pg.Color ('navy')
+   GRAY = pg.Color ('gray60')
+
+   CLUE_FONT = 'consolas'  #: font of the block length numbers
+   TRACE_SOLVER = False    #: developer flag. If True, the solver prints its progress and the permutations of the lines
 
    MAX_RECENT_LEN = 10   #: the maximum length of the recent file list within the config data
+   MAX_DIRTY_RECTS = 32  #: if more regions of the screen changed, the bounding rect of all is redrawn at once
+   #: events after which the whole screen must be redrawn
+   REDRAW_EVENTS = (pg.VIDEOEXPOSE, pg.WINDOWEXPOSED, pg.WINDOWSHOWN, pg.WINDOWRESTORED, pg.WINDOWFOCUSGAINED)
+   CHECKPOINT_SAVED = 'saved'  #: checkpoint of the undo stack at the saved state
+   CHECKPOINT_TRIAL = 'trial'  #: checkpoint of the undo stack where the trial mode was entered last
 
 
    #: Enum for the position of mouse click: 'COLBLOCKS ROWBLOCKS BOARD INVALID'
@@ -60,15 +76,14 @@ class NonogramGame:
       """An instance of class NonogramAssist.NonoAssist providing functions to get permuatation information of the 
       nonogram and to solving the nonogram"""
       
-      self.processedFields: dict 
+      self.board: NonoBoard.clNonoBoard 
       """
-      For each processed field within the nonogram we have an entry in the self.processedFields dictionary
-      The key is the tuple (column, row). Col and row are matrix indices for the field.
+      State and mode of all fields within the nonogram, held in NumPy arrays.
+      A field is given by the tuple (column, row). Col and row are matrix indices for the field.
       (0,0) is the upper left field; (1,0) the one to the right;  (0,1) the one below
-      The value is also a dict of: 
-         'pos': upper left pixel position of the pygame self.screen, 
-         'state': status of block regarding constants of NonoBlock.ClBlock FILLED CROSS UNKNOWN
-         'mode': mode of the block regarding constants of NonoBlock.ClBlock NORMAL TRIAL
+      The state of a field regarding constants of NonoBlock.ClBlock FILLED CROSS UNKNOWN, 
+      the mode regarding constants of NonoBlock.ClBlock NORMAL TRIAL.
+      The upper left pixel position of the field is calculated by GetNonogramFieldFromRowCol
       """
 
       self.propertyDict: dict
@@ -84,6 +99,8 @@ class NonogramGame:
          NoValidNonoFile:  ['', '']
          NoSolutionFound: ['', '']
          WantToSave: ['', '']
+         Solved: ['', '']
+         WrongLines: ''
          butOpenNew: ''
          butOpen:''
          butSave: ''
@@ -113,6 +130,25 @@ class NonogramGame:
 
       self.imgBusy: pg.Surface #00FFFF
 
+      self.completion = None   #: NonoCompletion.clCompletion of the board. Tracks the solved and the wrong rows and columns
+      self.reportedSolved = False  #: Is True, if the message for the solved nonogram was shown for the current board
+      self.shownWrongLines = 0     #: number of wrong lines shown in the window title
+      self.clueMatcher = None  #: NonoCompletion.clClueMatcher of the board. Marks the provably placed clue blocks
+      self.solveWorker = None 
+      """The NonoSolveWorker.clSolveWorker running AutoSolve in the background. None if the solver is not running"""
+
+      # The main loop only redraws the regions of the screen which changed since the last frame. 
+      # To find them, the drawn state of the board, the clue marks, the buttons and the solver progress is kept
+      self.fullRedraw = True    #: If True, the whole screen is redrawn with the next frame
+      self.allClueBlocks: list  #: 1D list of all NonoBlock.ClBlock of self.rowBlocks and self.colBlocks
+      self.clueIndex: dict      #: {(x, y) // self.pgBlockRes: [blocks]} the clue blocks overlapping a bucket. See BuildClueIndex
+      self.drawnBoard: tuple    #: Snapshot of self.board when drawn last. See NonoBoard.clNonoBoard.Snapshot
+      self.drawnClueMarks: list #: (state, mode) of each block of self.allClueBlocks when drawn last
+      self.drawnButtons: list   #: (image, highlighted, info text rect) of each button when drawn last
+      self.drawnProgress: tuple #: (solver running, number of solved fields) when drawn last
+      self.cellSprites: list    #: cellSprites [stateCode][modeCode] is the surface of a field. See CreateCellSprites
+      self.clueMarkSprites = {} #: {(size, color): surface} the rendered marks of the clue blocks. See GetClueMarkSprite
+
       self.noRows: int      #: number of rows of the nonogram
       self.noCols: int      #: number of columns of the nonogram
       self.gameMode: chr    
@@ -156,93 +192,18 @@ class NonogramGame:
 
       # Create an instance for undo redo actions
       self.undoStack: UndoRedo.clUndo   #: Stack for undo / redo actions
-      self.undoLengthAfterSave: int  #: The length of the undo stack after the nonogram was saved
+      # The undo stack has the checkpoint CHECKPOINT_SAVED at the saved state and CHECKPOINT_TRIAL where the trial mode was entered
 
       self.isNewNonogram: bool   #: Is True, if a new nonogram is loaded. In this case the Save button must be disabled
+      self.saveBinary = False    #: Is True, if the nonogram is saved in the binary format of NonoFile.SaveNonogramBinary
       self.currentFilePath: str  #: The file path of the current game
       self.newRecentFilePath: str  #: A file path entered via Open... which may be the new current file path, if the new filepath is a valid nonogram
 
 
    @staticmethod 
    def ReadNonogramFromFile (fileName):
-      """Reads the nonogram from file 
-
-         Fills the dictionaries self.rowBlocks, self.colBlocks. If additional data about already processed fields ara available, 
-         the dictionary self.processedFields will be filled.
-         Data format: Z/S n1 n2 ... Z for row data, S for column data; ni the blocklength 
-         Example for a 3 (rows) x 2 (columns) nonogram:
-         Z 2
-         Z 3 5
-         Z 1 1 1
-         S 3
-         S 1 2
-
-         Args:
-            filename (str): Path name of the file to read from.
-
-         Returns:
-            bool: The return value. True for success, False otherwise.
-            list: List of lists containing NonoBlock.ClBlock elements of the nonogram rows.
-                  See instance variable self.rowBlocks.
-            list: List of lists containing NonoBlock.ClBlock elements of the nonogram columns.
-                  See instance variable self.colBlocks.
-            dict: Dictionary equivalent to the instance variable self.processedFields
-      """
-      rdRowBlocks = []    
-      rdColBlocks = []
-      rdProcessedFields = {}
-
-      try:    
-         with open(fileName) as f:
-            for row, line in [rdl for rdl in enumerate (f.read().split('\n'))]:
-               if not line: continue
-               if line[0].upper () == "Z":
-                  # if the input line contains '#' block state /mode are available
-                  data = line[2:].split("#")
-                  # at least one element (data[0]) must be present 
-                  if len (data) == 1:
-                     pi = [NonoBlock.ClBlock (int(len)) for len in data[0].strip().split(" ")]
-                  elif len (data) >= 4:
-                     pi = [NonoBlock.ClBlock (int(len), state = s, mode = m) for len, s, m  in zip (data[0].split(" "), data [1], data [2])]
-
-                     # read the last data block with state/mode of self.processedFields
-                     # get every second element, one list starting at 0 the other with 1 and zip both
-                     for col, (s, m) in enumerate (list(zip(data[3][0::2], data[3][1::2]))):
-                        # only if state is not UNKNOWN we write data to self.processedFields 
-                        if s != NonoBlock.ClBlock.UNKNOWN:
-                           # since we do not know some pixel based variables we cannot give the right position yet.
-                           # we put negative values to mark the position to be invalid. The correct values will be calculated from the key of the dict 
-                           rdProcessedFields [(col, row)] = {'pos': (-1, -1), 'state': s, 'mode': m}
-
-                  else: 
-                     print ('Falsches Datenformat') 
-                     return False
-
-                  rdRowBlocks.append (pi)
-                  # if we have more than one element in data it must be the state/mode of the blocklength strings
-                  #  and the state/mode of the fields within the nonogram
-                  #   for c in data[1]:
-
-
-               elif line[0].upper() == "S":
-                  # if the input line contains '#' block state /mode are available
-                  data = line[2:].split("#")
-                  # at least one element (data[0]) must be present 
-                  if len (data) == 1:
-                     pi = [NonoBlock.ClBlock (int(len)) for len in data[0].strip().split(" ")]
-                  elif len (data) >= 3:
-                     pi = [NonoBlock.ClBlock (int(len), state = s, mode = m) for len, s, m  in zip (data[0].split(" "), data [1], data [2])]
-                  else: 
-                     print ('Falsches Datenformat') 
-                     return False
-                  rdColBlocks.append (pi)
-
-               else:  # input line does not start with 'Z' or 'S'
-                  return False, None, None, None
-
-            return True, rdRowBlocks, rdColBlocks, rdProcessedFields
-      except:
-         return False, None, None, None
+      """Reads the nonogram from file. See NonoFile.ReadNonogramFromFile"""
+      return NonoFile.ReadNonogramFromFile (fileName)
          
    #ff0000
 
@@ -257,14 +218,12 @@ class NonogramGame:
             int: The width in pixel to display the longest block length text left to the nonogram 
       """
       maxTxt = 0
-      # first get the width of a space
-      txtSurface = pg.font.SysFont('consolas', self.minBlockSize).render(' ', False, self.BLACK)
-      space = txtSurface.get_width ()
+      # first get the width of a space. The widths are taken from the font cache without rendering
+      space = fontCache.Size (self.CLUE_FONT, self.minBlockSize, ' ') [0]
       for blocks in blockArray:
          rowLen = 0
          for block in  (blocks):
-            txtSurface = pg.font.SysFont('consolas', self.minBlockSize).render(f'{block.length}', False, self.BLACK)
-            rowLen += txtSurface.get_width() + space
+            rowLen += fontCache.Size (self.CLUE_FONT, self.minBlockSize, f'{block.length}') [0] + space
          if rowLen > maxTxt: maxTxt = rowLen
       return maxTxt
 
@@ -300,7 +259,7 @@ class NonogramGame:
       y = 200
       os.environ['SDL_VIDEO_WINDOW_POS'] = "%d,%d" % (x,y)
 
-      self.processedFields = {}
+      self.board = NonoBoard.clNonoBoard (0, 0)
 
       self.propertyDict = cfg.ReadProperties (self.cfgFileName)
       if not self.propertyDict:  # we must use the default values
@@ -317,8 +276,6 @@ class NonogramGame:
       self.rectBoard = pg.Rect (0, 0, 0, 0)
       self.rectMenu = pg.Rect (0, 0, self.minLeftFrameWidth, self.minUpperFrameHeight)
 
-      self.undoLengthAfterSave = 0
-
       self.screen = pg.display.set_mode([self.screenWidth, self.screenHeight])
       # Screen for background
       self.screenBkg = pg.Surface([self.screenWidth, self.screenHeight])
@@ -365,13 +322,21 @@ class NonogramGame:
 
       # Create an instance for undo redo actions
       self.undoStack = UndoRedo.clUndo ()
-      self.undoLengthAfterSave = 0
+      self.undoStack.SetCheckpoint (self.CHECKPOINT_SAVED)  # the loaded nonogram is the saved state
+
+      # the completion of the rows and columns is tracked with each change of the board
+      if self.completion is not None: self.completion.Close ()
+      self.completion = NonoCompletion.clCompletion (self.board, self.rowBlocks, self.colBlocks)
+      self.reportedSolved = self.completion.IsSolved ()  # no message for a loaded solved nonogram
+      self.shownWrongLines = self.completion.noWrong
+      if self.clueMatcher is not None: self.clueMatcher.Close ()
+      self.clueMatcher = NonoCompletion.clClueMatcher (self.board, self.rowBlocks, self.colBlocks)
 
       # Now we create an instance of the nonogram assistant
       self.nonoAssist = nAss.NonoAssist (self.rowBlocks, self.colBlocks)
-
-      # The following print will only be excecuted if nAss.DEBUGMODE is true
-      self.nonoAssist.PrintPermutationsOfRowsAndCols()
+      if self.TRACE_SOLVER:
+         self.nonoAssist.instrument.AddSink (NonoInstrument.clPrintSink ())
+         self.nonoAssist.EmitPermutationsOfRowsAndCols ()
 
    #ff00ff
    def CreateButtons (self):
@@ -431,6 +396,9 @@ class NonogramGame:
       self.imgBusy = pg.image.load (r'Images\busy.png')
 
    def SaveNonogramToFile (self, filename):
+      if self.saveBinary:
+         NonoFile.SaveNonogramBinary (filename, self.rowBlocks, self.colBlocks, self.board)
+         return
       with open(filename, "w", newline='') as f:
          for row, data in enumerate (self.rowBlocks):
             # First the block length
@@ -441,14 +409,7 @@ class NonogramGame:
             f.write (''.join(bl.mode for bl in data) + '#')
             # fourth the status/mode of the nonogramm fields in each row
             # we must run through all posible columns in the current row
-            for col in range (self.noCols):
-               # if the current (row, col) is in the self.processedFields dict, we write the state/mode
-               # if not we write the default (NORMAL)
-               if (col, row) in self.processedFields:
-                  field = self.processedFields [(col, row)]
-                  f.write (field ['state']+field ['mode'])
-               else:
-                  f.write (NonoBlock.ClBlock.UNKNOWN + NonoBlock.ClBlock.NORMAL)
+            f.write (self.board.RowText (row))
             f.write ('\n')
 
          # now all columns
@@ -466,11 +427,6 @@ class NonogramGame:
       upperLeft = (col * self.pgBlockRes + self.rectBoard.left, row * self.pgBlockRes + self.rectBoard.top)
       return upperLeft
 
-   def CheckForInvalidPositons (self):
-      for pos, blockAttr in self.processedFields.items():
-         if blockAttr ['pos'][0] <= 0:
-            blockAttr ['pos'] = self.GetNonogramFieldFromRowCol (*pos)
-
    def DrawNonogramBackground (self):
       self.screenBkg.fill(self.WHITE)
       #pg.draw.rect (self.screenBkg, (0, 0, 0), ((self.leftFrameWidth, self.upperFrameHeight), (self.screenWidth, self.screenHeight)), width=self.rectLineWidth)
@@ -489,12 +445,11 @@ class NonogramGame:
 
       # the text for horizontal block length
       # first get the width of a space
-      txtSurface = pg.font.SysFont('consolas', self.minBlockSize).render(' ', False, self.BLACK)
-      space = txtSurface.get_width ()
+      space = fontCache.Size (self.CLUE_FONT, self.minBlockSize, ' ') [0]
       for y, blocks in enumerate (self.rowBlocks):
          firstRun = True
          for x, block in enumerate (blocks [::-1]):  # we must start at the end
-            txtSurface = pg.font.SysFont('consolas', self.minBlockSize).render(f'{block.length}', False, self.BLACK)
+            txtSurface = fontCache.Render (self.CLUE_FONT, self.minBlockSize, f'{block.length}', False, self.BLACK)
             if firstRun: pos = (self.leftFrameWidth - txtSurface.get_width() - 1, self.upperFrameHeight + self.rectLineWidth + y * self.pgBlockRes + 1)
             else: pos = tuple(map(operator.sub, pos, (txtSurface.get_width(), 0)))
             self.screenBkg.blit(txtSurface, pos)
@@ -509,11 +464,9 @@ class NonogramGame:
       # the text for vertical block length
       for y, blocks in enumerate (self.colBlocks):
          for x, block in enumerate (blocks [::-1]):  # we must start at the end
-            s = self.minBlockSize
-            txtSurface = pg.font.SysFont('consolas', s).render(f'{block}', False, self.BLACK)
-            while txtSurface.get_width() >= self.pgBlockRes-1:
-               s -= 1
-               txtSurface = pg.font.SysFont('consolas', s).render(f'{block.length}', False, self.BLACK)
+            # the largest font size, for which the number fits into the field, is cached for each number and field size
+            s = fontCache.FittingSize (self.CLUE_FONT, self.minBlockSize, f'{block.length}', self.pgBlockRes-1)
+            txtSurface = fontCache.Render (self.CLUE_FONT, s, f'{block.length}', False, self.BLACK)
 
             pos = (self.leftFrameWidth + self.rectLineWidth + (y+1) * self.pgBlockRes - txtSurface.get_width(), self.upperFrameHeight - (x+1) * self.pgBlockRes)
             # remember the rects of the vertical block length
@@ -522,29 +475,121 @@ class NonogramGame:
             block.mode = self.gameMode
             self.screenBkg.blit(txtSurface, pos)
 
-   def DrawNonogram (self):
-      for blockAttr in self.processedFields.values():
-         if blockAttr ['state'] == NonoBlock.ClBlock.UNKNOWN: continue
-         col = self.RED if blockAttr ['mode'] == NonoBlock.ClBlock.TRIAL else self.BLACK
-         if blockAttr ['state'] == NonoBlock.ClBlock.FILLED: 
-            pg.draw.rect (self.screen, col, (blockAttr ['pos'], (self.pgBlockRes-0, self.pgBlockRes-0)), width = 0, border_radius =-1)
-         elif blockAttr ['state'] == NonoBlock.ClBlock.CROSS: 
-            startPos = blockAttr ['pos']
-            endPos = tuple(map(operator.add, blockAttr ['pos'], (self.pgBlockRes, self.pgBlockRes)))
-            pg.draw.line (self.screen, col, startPos, endPos)
-            startPos = tuple(map(operator.add, blockAttr ['pos'], (self.pgBlockRes, 0)))
-            endPos = tuple(map(operator.add, blockAttr ['pos'], (0, self.pgBlockRes)))
-            pg.draw.line (self.screen, col, startPos, endPos)
-
-   def MarkProcessedBlocks (self):
       # make a 1D list from 2D self.rowBlocks together with 2D self.colBlocks list
-      for block in list( itertools.chain(*self.rowBlocks, *self.colBlocks)):
-         if block.state == NonoBlock.ClBlock.UNKNOWN: continue
-         if block.state == NonoBlock.ClBlock.FILLED or block.state == NonoBlock.ClBlock.CROSS:
-            rect = block.rectOnScreen 
-            col = self.RED if block.mode == NonoBlock.ClBlock.TRIAL else self.NAVY
-            pg.draw.line (self.screen, col, rect.topleft, rect.bottomright, width = 3) 
-            pg.draw.line (self.screen, col, rect.topright, rect.bottomleft, width = 3)
+      self.allClueBlocks = list (itertools.chain(*self.rowBlocks, *self.colBlocks))
+      self.BuildClueIndex ()
+      self.CreateCellSprites ()
+      self.fullRedraw = True
+
+   def BuildClueIndex (self):
+      """Builds the bucket grid to find the clue block under the mouse. The screen is divided into buckets of the size
+      of a field and each block is entered in all buckets its rect overlaps. A clue number is at most a few fields wide,
+      so each bucket holds only a few blocks
+      """
+      res = self.pgBlockRes
+      self.clueIndex = {}
+      for block in self.allClueBlocks:
+         rect = block.rectOnScreen
+         for bx in range (rect.left // res, (rect.right - 1) // res + 1):
+            for by in range (rect.top // res, (rect.bottom - 1) // res + 1):
+               self.clueIndex.setdefault ((bx, by), []).append (block)
+
+   def GetClueBlockFromMousePos (self, pos):
+      """Returns the clue block (NonoBlock.ClBlock) at the screen position pos or None"""
+      for block in self.clueIndex.get ((pos [0] // self.pgBlockRes, pos [1] // self.pgBlockRes), ()):
+         if block.WasClicked (pos): return block
+      return None
+
+   def GetCellRange (self, area):
+      """Returns (c0, r0, c1, r1): the columns c0..c1-1 and rows r0..r1-1 of the fields overlapping the screen area"""
+      res = self.pgBlockRes
+      c0 = max (0, (area.left - self.rectBoard.left) // res - 1)
+      r0 = max (0, (area.top - self.rectBoard.top) // res - 1)
+      c1 = min (self.noCols, (area.right - self.rectBoard.left) // res + 1)
+      r1 = min (self.noRows, (area.bottom - self.rectBoard.top) // res + 1)
+      return c0, r0, c1, r1
+
+   def GetFieldRect (self, col, row):
+      # a cross reaches the first pixel of the next field, so the rect is one pixel larger than the field
+      return pg.Rect (self.GetNonogramFieldFromRowCol (col, row), (self.pgBlockRes+1, self.pgBlockRes+1))
+
+   def DrawNonogram (self, area = None):
+      # only the fields overlapping area (a rect on the screen) are drawn. None: all fields
+      if area is None: 
+         cols, rows = self.board.KnownPositions ()
+      else:
+         c0, r0, c1, r1 = self.GetCellRange (area)
+         if c0 >= c1 or r0 >= r1: return
+         rows, cols = self.board.state [r0:r1, c0:c1].nonzero ()
+         cols, rows = cols + c0, rows + r0
+      states, modes = self.board.GetCodes (cols, rows)
+      # the upper left pixel positions of all fields, see GetNonogramFieldFromRowCol
+      xs = cols * self.pgBlockRes + self.rectBoard.left
+      ys = rows * self.pgBlockRes + self.rectBoard.top
+      # blits is fed by iterators, so no list of tuples per field is built. A cross reaches the first pixel of its right
+      # and lower neighbours, so the crosses are drawn first, in the order of the fields, and the filled fields after them
+      sel = states == self.board.CROSS
+      if sel.any ():
+         crossSprites = np.array (self.cellSprites [self.board.CROSS], dtype = object) [modes [sel]]
+         self.screen.blits (zip (crossSprites.tolist (), zip (xs [sel].tolist (), ys [sel].tolist ())), doreturn = False)
+      for modeCode, sprite in enumerate (self.cellSprites [self.board.FILLED]):
+         sel = (states == self.board.FILLED) & (modes == modeCode)
+         if sel.any ():
+            self.screen.blits (zip (itertools.repeat (sprite), zip (xs [sel].tolist (), ys [sel].tolist ())), doreturn = False)
+
+   def CreateCellSprites (self):
+      """Renders the surfaces of a FILLED and a CROSS field in normal (black) and trial (red) mode at the current field size.
+      self.cellSprites [stateCode][modeCode] is the surface of a field, see NonoBoard.clNonoBoard for the codes.
+      A cross reaches the first pixel of the next field, so the surfaces are one pixel larger than a field. 
+      The rest of the surface is transparent (color key), so the grid lines are not covered
+      """
+      res = self.pgBlockRes
+      colorKey = pg.Color ('magenta')
+      self.cellSprites = [[None, None] for _ in self.board.STATES]
+      for modeCode, col in ((self.board.NORMAL, self.BLACK), (self.board.TRIAL, self.RED)):
+         for stateCode in (self.board.FILLED, self.board.CROSS):
+            sprite = pg.Surface ((res+1, res+1))
+            sprite.fill (colorKey)
+            sprite.set_colorkey (colorKey, pg.RLEACCEL)
+            if stateCode == self.board.FILLED:
+               pg.draw.rect (sprite, col, ((0, 0), (res, res)), width = 0, border_radius =-1)
+            else:
+               pg.draw.line (sprite, col, (0, 0), (res, res))
+               pg.draw.line (sprite, col, (res, 0), (0, res))
+            self.cellSprites [stateCode][modeCode] = sprite
+
+   def GetClueMarkRect (self, block):
+      # the lines of the mark are 3 pixel wide
+      return block.rectOnScreen.inflate (4, 4)
+
+   def MarkProcessedBlocks (self, area = None):
+      # only the marks overlapping area (a rect on the screen) are drawn. None: all marks
+      # The marks set by the user are navy or red. Blocks provably placed on the board (ClBlock.isPlaced) are marked gray
+      for block in self.allClueBlocks:
+         if block.state == NonoBlock.ClBlock.UNKNOWN and not block.isPlaced: continue
+         if area is not None and not area.colliderect (self.GetClueMarkRect (block)): continue
+         if block.state == NonoBlock.ClBlock.FILLED or block.state == NonoBlock.ClBlock.CROSS or block.isPlaced:
+            if block.state == NonoBlock.ClBlock.UNKNOWN: col = self.GRAY
+            else: col = self.RED if block.mode == NonoBlock.ClBlock.TRIAL else self.NAVY
+            markRect = self.GetClueMarkRect (block)
+            self.screen.blit (self.GetClueMarkSprite (markRect.size, col), markRect)
+
+   def GetClueMarkSprite (self, size, col):
+      """Returns the surface of the mark of a clue block with the mark rect size (see GetClueMarkRect). 
+      The marks are blitted, because pygame draws a clipped line of width 3 with other pixels than the unclipped one. 
+      So a mark redrawn in a dirty rect which overlaps the mark of a neighbour block would differ from a full redraw
+      """
+      key = (tuple (size), tuple (col))
+      if key not in self.clueMarkSprites:
+         colorKey = pg.Color ('magenta')
+         sprite = pg.Surface (size)
+         sprite.fill (colorKey)
+         sprite.set_colorkey (colorKey, pg.RLEACCEL)
+         rect = pg.Rect ((0, 0), size).inflate (-4, -4)
+         pg.draw.line (sprite, col, rect.topleft, rect.bottomright, width = 3) 
+         pg.draw.line (sprite, col, rect.topright, rect.bottomleft, width = 3)
+         self.clueMarkSprites [key] = sprite
+      return self.clueMarkSprites [key]
 
    def GetNonogramFieldFromMousePos (self, pos):
       # make position relative to the upper left corner of the nonogram: subtract upper left corner
@@ -562,9 +607,14 @@ class NonogramGame:
       else:
          # get the filename without extension from file path
          fileName = pathlib.Path(self.currentFilePath).stem
-         pg.display.set_caption(f'{fileName}  Trail Mode' if self.gameMode == NonoBlock.ClBlock.TRIAL else f'{fileName}   Normal Mode')
+         title = f'{fileName}  Trail Mode' if self.gameMode == NonoBlock.ClBlock.TRIAL else f'{fileName}   Normal Mode'
+         if self.shownWrongLines: title += f'   ({self.shownWrongLines} {self.localMsgText ["WrongLines"]})'
+         pg.display.set_caption(title)
 
    def SetGameMode (self, mode):
+      # the start of a trial can be restored in one step, see RestoreCheckpoint
+      if mode == NonoBlock.ClBlock.TRIAL and self.gameMode != NonoBlock.ClBlock.TRIAL:
+         self.undoStack.SetCheckpoint (self.CHECKPOINT_TRIAL)
       self.gameMode = mode
       self.buttonTrial.SetEnabledImage (self.gameMode == NonoBlock.ClBlock.NORMAL)
       self.SetGameTitle ()
@@ -587,7 +637,7 @@ class NonogramGame:
 
             elif member == self.buttonSave:
                self.SaveNonogramToFile (self.currentFilePath)
-               self.undoLengthAfterSave = self.undoStack.CanUndo() 
+               self.undoStack.SetCheckpoint (self.CHECKPOINT_SAVED)
 
             elif member == self.buttonSaveAs:
                retCode = self.enExitCode.GET_SAVEAS_REQUEST
@@ -648,147 +698,129 @@ class NonogramGame:
          rectPos, nonoPos = self.GetNonogramFieldFromMousePos (event.pos)
          modified = True
          # We need the current state/mode for the undo stack
-         # if field on nonogram board was never changed it is not yet in the self.processedFields.
-         # In this case the state ist UNKNOWN
-         if nonoPos in self.processedFields:
-            s, m = (list (self.processedFields [nonoPos].values()))[1:]
-         else:
-            s = NonoBlock.ClBlock.UNKNOWN
-            m = NonoBlock.ClBlock.NORMAL
+         s, m = self.board.Get (nonoPos)
 
          if event.button == pg.BUTTON_LEFT:
             # we only do something, if there is any change
             if s == NonoBlock.ClBlock.FILLED and m == self.gameMode: modified = False
             else:
-               self.processedFields [nonoPos] = {'pos': rectPos, 'state': NonoBlock.ClBlock.FILLED, 'mode': self.gameMode}
+               self.board.Set (nonoPos, NonoBlock.ClBlock.FILLED, self.gameMode)
          elif event.button == pg.BUTTON_RIGHT:
             if s == NonoBlock.ClBlock.CROSS and m == self.gameMode: modified = False
             else:
-               self.processedFields [nonoPos] = {'pos': rectPos, 'state': NonoBlock.ClBlock.CROSS, 'mode': self.gameMode}
+               self.board.Set (nonoPos, NonoBlock.ClBlock.CROSS, self.gameMode)
          elif event.button == pg.BUTTON_MIDDLE:
             if s == NonoBlock.ClBlock.UNKNOWN and m == self.gameMode: modified = False
             else:
-               self.processedFields [nonoPos] = {'pos': rectPos, 'state': NonoBlock.ClBlock.UNKNOWN, 'mode': self.gameMode}
+               self.board.Set (nonoPos, NonoBlock.ClBlock.UNKNOWN, self.gameMode)
          else: modified = False
          if modified: 
-            self.undoStack.Append (UndoRedo.EnUndoAction.SINGLE, [nonoPos, s, m], self.processedFields)
+            self.undoStack.Append (UndoRedo.EnUndoAction.SINGLE, [nonoPos, s, m], self.board)
 
       elif self.rectColBlocks.collidepoint (event.pos) or self.rectRowBlocks.collidepoint (event.pos):
-         if event.button == pg.BUTTON_LEFT:
-            # make a 1D list from 2D self.rowBlocks together with 2D self.colBlocks list
-            for block in list( itertools.chain(*self.rowBlocks, *self.colBlocks)):
-               if block.WasClicked (event.pos):
-                  # we only do something, if there is any change
-                  if block.state != NonoBlock.ClBlock.CROSS or block.mode != self.gameMode:
-                     self.undoStack.Append (UndoRedo.EnUndoAction.CHRMARK, [block.state, block.mode], block)
-                     block.state = NonoBlock.ClBlock.CROSS
-                     block.mode = self.gameMode
-                  break
+         block = self.GetClueBlockFromMousePos (event.pos)
+         if block is None: pass
+         elif event.button == pg.BUTTON_LEFT:
+            # we only do something, if there is any change
+            if block.state != NonoBlock.ClBlock.CROSS or block.mode != self.gameMode:
+               self.undoStack.Append (UndoRedo.EnUndoAction.CHRMARK, [block.state, block.mode], block)
+               block.state = NonoBlock.ClBlock.CROSS
+               block.mode = self.gameMode
 
          elif event.button == pg.BUTTON_RIGHT or event.button == pg.BUTTON_MIDDLE:
-            # make a 1D list from 2D self.rowBlocks together with 2D self.colBlocks list
-            for block in list( itertools.chain(*self.rowBlocks, *self.colBlocks)):
-               if block.WasClicked (event.pos):
-                  # we only do something, if there is any change
-                  if block.state != NonoBlock.ClBlock.UNKNOWN:
-                     self.undoStack.Append (UndoRedo.EnUndoAction.CHRMARK, [block.state, NonoBlock.ClBlock.NORMAL], block)
-                     block.state = NonoBlock.ClBlock.UNKNOWN
-                  break
+            # we only do something, if there is any change
+            if block.state != NonoBlock.ClBlock.UNKNOWN:
+               self.undoStack.Append (UndoRedo.EnUndoAction.CHRMARK, [block.state, NonoBlock.ClBlock.NORMAL], block)
+               block.state = NonoBlock.ClBlock.UNKNOWN
                
       elif self.rectMenu.collidepoint (event.pos):
          if event.button == pg.BUTTON_LEFT:
             returnCode = self.CheckButtonLeftClick ()
          elif event.button == pg.BUTTON_RIGHT:
             returnCode = self.CheckButtonRightClick ()
-            pass
+            self.fullRedraw = True  # the context menu covered the window
 
       return returnCode
 
    def RedToWhite (self):
-      # First all red blocks from Nonogram
-      undoData = []
-      for pos, blockAttr in self.processedFields.items():
-         if blockAttr ['mode'] == NonoBlock.ClBlock.TRIAL:
-            s, m = (list (blockAttr.values()))[1:]
-            undoData.append ([pos, s, m])
-            blockAttr ['state'] = NonoBlock.ClBlock.UNKNOWN
-            blockAttr ['mode'] = NonoBlock.ClBlock.NORMAL
+      # All red blocks from Nonogram are removed within the board arrays
+      undoData = self.board.RedToWhite ()
       if undoData:
-         self.undoStack.Append (UndoRedo.EnUndoAction.RED2BW, undoData, self.processedFields)
+         self.undoStack.Append (UndoRedo.EnUndoAction.RED2BW, undoData, self.board)
          
    def RedToBlack (self):
-      # First all red blocks from Nonogram
-      undoData = []
-      for pos, blockAttr in self.processedFields.items():
-         if blockAttr ['mode'] == NonoBlock.ClBlock.TRIAL: 
-            s, m = (list (blockAttr.values()))[1:]
-            undoData.append ([pos, s, m])
-            blockAttr ['state'] = s
-            blockAttr ['mode'] = NonoBlock.ClBlock.NORMAL
+      # All red blocks from Nonogram are set to normal mode within the board arrays
+      undoData = self.board.RedToBlack ()
       if undoData:
-         self.undoStack.Append (UndoRedo.EnUndoAction.RED2BW, undoData, self.processedFields)
+         self.undoStack.Append (UndoRedo.EnUndoAction.RED2BW, undoData, self.board)
 
    def CopyAutoFillDataToNonogram (self, autoFillData: dict):
-      undoData = []
       if autoFillData:
-         for pos, state in autoFillData.items():
-            if pos in self.processedFields:
-               s, m = (list (self.processedFields [pos].values()))[1:]
-            else:
-               s = NonoBlock.ClBlock.UNKNOWN
-               m = NonoBlock.ClBlock.NORMAL
-            undoData.append ([pos, s, m])
-            # the correct pixel positions must be assigned later. To mark them as invalid we use -1
-            self.processedFields [pos] = {'pos': (-1, -1), 'state': state, 'mode': self.gameMode}
-
-         # Now we convert the -1 pixel data into the correct ones
-         self.CheckForInvalidPositons ()
-         self.undoStack.Append (UndoRedo.EnUndoAction.AUTOFILLOBV, undoData, self.processedFields)
+         undoData = self.board.SetFields (autoFillData, self.gameMode)
+         self.undoStack.Append (UndoRedo.EnUndoAction.AUTOFILLOBV, undoData, self.board)
 
    def AutofillObvious (self):
       autoFillData = self.nonoAssist.FillObviousFields()
       self.CopyAutoFillDataToNonogram (autoFillData)
 
    def AutofillRowWithPresets (self): 
-      autoFillData = self.nonoAssist.FillFieldsWithPresets(self.processedFields)
+      autoFillData = self.nonoAssist.FillFieldsWithPresets(self.board)
       self.CopyAutoFillDataToNonogram (autoFillData[0])
 
    def AutofillColWithPresets (self):
-      autoFillData = self.nonoAssist.FillFieldsWithPresets (self.processedFields, False)
+      autoFillData = self.nonoAssist.FillFieldsWithPresets (self.board, False)
       self.CopyAutoFillDataToNonogram (autoFillData[0])
 
    #00FFFF
-   def HandleBusyEvent (self):
-      for event in pg.event.get():
-         if event.type == pg.KEYDOWN:
-            if event.key == pg.K_ESCAPE: return self.enExitCode.CANCEL
-      return self.enExitCode.NONE
-   
    def AutoSolve (self):
-      isSolved = False
-      solver = self.nonoAssist.NonogramSolver ()
-      partlySolved = False
-      self.screen.blit(self.screenBkg, (0, 0))
-      self.screen.blit(self.imgBusy, (50, 2))
-      txtSurface = pg.font.SysFont('consolas', 20).render('ESC: Stop', False, self.BLACK)
-      self.screen.blit(txtSurface, (20, 90))
-
-      for isSolved, autoFillData in solver:
-         if autoFillData: 
-            partlySolved = True 
-            self.CopyAutoFillDataToNonogram (autoFillData)
-            self.DrawNonogram ()
-            pg.display.flip()
-
-         if self.HandleBusyEvent () == self.enExitCode.CANCEL:
-            isSolved = True # we set to true to suppress message boxes after solve loop 
+      # The solver runs in a background thread. Its results are taken over by ProcessSolveWorker within the main loop
+      if self.solveWorker is not None: return
+      # all fields set by the solver are merged into one undo entry, so they can be undone at once
+      self.undoStack.BeginTransaction ()
+      self.solveWorker = NonoSolveWorker.clSolveWorker (self.nonoAssist).Start ()
+
+   def ProcessSolveWorker (self):
+      """Sets the fields found by the background solver and finishes the solving, when the solver has stopped"""
+      if self.solveWorker is None: return
+      for kind, data in self.solveWorker.Poll ():
+         if kind == NonoSolveWorker.EnSolveMsg.PROGRESS:
+            newFields = data [0]
+            self.undoStack.Append (UndoRedo.EnUndoAction.AUTOFILLOBV, self.board.SetFields (newFields, self.gameMode), self.board)
+            continue
+
+         # the solver has stopped
+         partlySolved = self.solveWorker.noKnownFields > 0
+         self.solveWorker = None
+         self.undoStack.EndTransaction ()
+         self.fullRedraw = True  # a message box may cover the window
+
+         if kind == NonoSolveWorker.EnSolveMsg.ERROR: 
+            QtDialogs.MessageBox (self.localMsgText ['SolverError'], f'{type (data).__name__}: {data}')
             break
-
-      if not isSolved:  # not solved at all, maybe not unique
-         if partlySolved: # seems to be only party solved
-            QtDialogs.MessageBox (*self.localMsgText ['PartlySolutionOnly'])
-         else: # not solved at all, maybe not unique
+         isSolved, isCancelled, isContradictory = data
+         if isContradictory:
+            # the fields set by the solver are no part of a solution, they are removed in one step
+            if partlySolved: self.undoStack.Undo ()
             QtDialogs.MessageBox (*self.localMsgText ['NoSolutionFound'])
+            break
+         if isCancelled: isSolved = True # we set to true to suppress message boxes after cancel
+         if not isSolved:
+            if partlySolved: # seems to be only party solved
+               QtDialogs.MessageBox (*self.localMsgText ['PartlySolutionOnly'])
+            else: # not solved at all, maybe not unique
+               QtDialogs.MessageBox (*self.localMsgText ['NoSolutionFound'])
+         break
+
+   def GetProgressRect (self):
+      # the area of the busy image and the progress text
+      return pg.Rect (0, 0, self.leftFrameWidth, 120)
+
+   def DrawSolveProgress (self):
+      if self.solveWorker is None: return
+      self.screen.blit(self.imgBusy, (50, 2))
+      self.screen.blit(fontCache.Render (self.CLUE_FONT, 20, 'ESC: Stop', False, self.BLACK), (20, 90))
+      progress = f'{self.solveWorker.noKnownFields} / {self.solveWorker.noFields}'
+      self.screen.blit(fontCache.Render (self.CLUE_FONT, 20, progress, False, self.BLACK, cache=False), (150, 90))
 
    def Old_AutoSolve (self):
       isSolved, autoFillData = self.nonoAssist.NonogramSolver ()
@@ -800,17 +832,32 @@ class NonogramGame:
          QtDialogs.MessageBox (*self.localMsgText ['NoSolutionFound'])
 
    def HasTrialBlocks (self):
-      return [NonoBlock.ClBlock.TRIAL] in [(list (blockAttr.values()))[2:] for blockAttr in self.processedFields.values()]
+      return self.board.HasTrial ()
+
+   def CheckCompletion (self):
+      """Shows the number of wrong lines in the window title and a message, when the nonogram got solved"""
+      if self.completion.noWrong != self.shownWrongLines:
+         self.shownWrongLines = self.completion.noWrong
+         self.SetGameTitle ()
+      if self.solveWorker is not None: return  # the message is shown after the solver has finished
+      isSolved = self.completion.IsSolved ()
+      if isSolved and not self.reportedSolved:
+         self.fullRedraw = True  # the message box covers the window
+         QtDialogs.MessageBox (*self.localMsgText ['Solved'])
+      self.reportedSolved = isSolved
 
    def checkButtonEnable (self):
 
       self.buttonUndo.SetEnabled (self.undoStack.CanUndo ())
+      # the memory used by the undo history and its limit
+      self.buttonUndo.SetInfoText (f'{self.localMsgText ["butUndo"]}  ({self.undoStack.MemoryUsage () / 2**20:.1f} / '
+                                   f'{self.undoStack.maxMemory / 2**20:.0f} MB)')
       self.buttonRedo.SetEnabled (self.undoStack.CanRedo ())
       hasTrialBlocks = self.HasTrialBlocks ()
       self.buttonRtoB.SetEnabled (hasTrialBlocks)
       self.buttonRtoW.SetEnabled (hasTrialBlocks)
-      self.buttonSave.SetEnabled (not self.isNewNonogram and self.undoStack.CanUndo() != self.undoLengthAfterSave)
-      self.buttonSaveAs.SetEnabled (self.undoStack.CanUndo() != self.undoLengthAfterSave)
+      self.buttonSave.SetEnabled (not self.isNewNonogram and not self.undoStack.IsAtCheckpoint (self.CHECKPOINT_SAVED))
+      self.buttonSaveAs.SetEnabled (not self.undoStack.IsAtCheckpoint (self.CHECKPOINT_SAVED))
       self.buttonTrial.SetEnabled (True)
 
    def ShowButtonInfoText (self):
@@ -868,15 +915,105 @@ class NonogramGame:
 
       return exitCode
 
+   def GetDirtyRects (self, inputHandled: bool):
+      """Returns the list of the screen rects which changed since the last frame and stores the drawn state. 
+      The clue marks set by the user can only change by user input, so they are only checked if inputHandled. The 
+      automatic marks change with the board, the clue matcher collects them.
+      """
+      dirtyRects = []
+      changed = self.board.ChangedSince (self.drawnBoard)
+      if changed is None: return [self.screen.get_rect ()]
+      for c, r in zip (changed [0].tolist (), changed [1].tolist ()):
+         dirtyRects.append (self.GetFieldRect (c, r))
+      if len (changed [0]): self.drawnBoard = self.board.Snapshot ()
+
+      if inputHandled:
+         for i, block in enumerate (self.allClueBlocks):
+            if self.drawnClueMarks [i] != (block.state, block.mode):
+               self.drawnClueMarks [i] = (block.state, block.mode)
+               dirtyRects.append (self.GetClueMarkRect (block))
+      for block in self.clueMatcher.TakeChangedBlocks ():
+         dirtyRects.append (self.GetClueMarkRect (block))
+
+      for i, member in enumerate (self.groupButtons):
+         drawn = (member.image, member.hovered and member.enabled, member.InfoTextRect ())
+         if drawn != self.drawnButtons [i]:
+            dirtyRects.append (member.HighlightRect ())
+            for infoRect in (drawn [2], self.drawnButtons [i][2]):
+               if infoRect: dirtyRects.append (infoRect)
+            self.drawnButtons [i] = drawn
+
+      drawn = (self.solveWorker is not None, self.solveWorker.noKnownFields if self.solveWorker else 0)
+      if drawn != self.drawnProgress:
+         dirtyRects.append (self.GetProgressRect ())
+         self.drawnProgress = drawn
+      return dirtyRects
+
+   def StoreDrawnState (self):
+      self.drawnBoard = self.board.Snapshot ()
+      self.drawnClueMarks = [(block.state, block.mode) for block in self.allClueBlocks]
+      self.clueMatcher.TakeChangedBlocks ()
+      self.drawnButtons = [(member.image, member.hovered and member.enabled, member.InfoTextRect ()) for member in self.groupButtons]
+      self.drawnProgress = (self.solveWorker is not None, self.solveWorker.noKnownFields if self.solveWorker else 0)
+
+   def RedrawRegion (self, area):
+      """Draws all layers of the screen within area: background, fields, clue marks, buttons, info texts and progress"""
+      self.screen.set_clip (area)
+      self.screen.blit (self.screenBkg, area, area)
+      self.DrawNonogram (area)
+      self.MarkProcessedBlocks (area)
+      for member in self.groupButtons:
+         if not area.colliderect (member.HighlightRect ()): continue
+         member.DrawHighlight ()
+         self.screen.blit (member.image, member.rect)
+      self.ShowButtonInfoText ()
+      self.DrawSolveProgress ()
+      self.screen.set_clip (None)
+
+   def UpdateScreen (self, inputHandled: bool):
+      """Redraws only the regions of the screen, which changed since the last frame, and updates them on the display.
+      If nothing changed, nothing is drawn
+      """
+      for member in self.groupButtons:
+         member.check_hover ()
+      if self.fullRedraw:
+         self.StoreDrawnState ()
+         self.RedrawRegion (self.screen.get_rect ())
+         pg.display.flip ()
+         self.fullRedraw = False
+         return
+
+      dirtyRects = self.GetDirtyRects (inputHandled)
+      if not dirtyRects: return
+      if len (dirtyRects) > self.MAX_DIRTY_RECTS: dirtyRects = [dirtyRects [0].unionall (dirtyRects [1:])]
+      for rect in dirtyRects:
+         self.RedrawRegion (rect)
+      pg.display.update (dirtyRects)
+
    def RunPygameMainLoop (self):
       clock = pg.time.Clock()
       fps = 20
       exitCode = self.enExitCode.NONE
       goOn = True
       returnCode = 0
+      self.fullRedraw = True
       while goOn:
          clock.tick(fps)
+         inputHandled = False
          for event in pg.event.get():
+            if event.type in self.REDRAW_EVENTS: self.fullRedraw = True
+            if event.type == pg.MOUSEBUTTONDOWN or event.type == pg.KEYDOWN: inputHandled = True
+            if self.solveWorker is not None:
+               # while the solver is running, only ESC and closing the window are handled
+               if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE: self.solveWorker.Cancel ()
+               if event.type == pg.QUIT:
+                  self.solveWorker.Cancel ()
+                  self.solveWorker.Join ()
+                  self.solveWorker = None
+                  goOn = False
+                  exitCode = self.enExitCode.QUIT
+               continue
+
             if event.type == pg.MOUSEBUTTONDOWN:
                returnCode = self.HandleMouseEvent (event)
                if returnCode == self.enExitCode.GET_OPEN_REQUEST or returnCode == self.enExitCode.GET_OPEN_NEW_REQUEST or \
@@ -885,26 +1022,33 @@ class NonogramGame:
                   exitCode = returnCode
 
                elif returnCode == self.enExitCode.GET_SAVEAS_REQUEST:
-                  filePath = QtDialogs.GetSaveFileName (self.propertyDict ['StartDirSaveAs'])
+                  filePath, self.saveBinary = QtDialogs.GetSaveFileName (self.propertyDict ['StartDirSaveAs'], self.saveBinary)
                   # GetSaveFileName should return a null string when user cancels the dialog, but it returns '.'
                   if filePath == '.': filePath = ''
+                  self.fullRedraw = True  # the dialog covered the window
                   if filePath:
                      self.SaveNonogramToFile (filePath)
                      self.propertyDict ['StartDirSaveAs'] = str (pathlib.Path(filePath).parent)
                      self.currentFilePath = filePath
                      self.SetGameTitle ()
-                     self.undoLengthAfterSave = self.undoStack.CanUndo()
+                     self.undoStack.SetCheckpoint (self.CHECKPOINT_SAVED)
                      self.isNewNonogram = False
 
             if event.type == pg.KEYDOWN:
                # chnage game mode NORMAL/TRIAL
-               if event.key == pg.K_t: 
+               if event.key == pg.K_t and not event.mod & pg.KMOD_CTRL: 
                   self.SetGameMode (NonoBlock.ClBlock.TRIAL)
                if event.key == pg.K_n: 
                   self.SetGameMode (NonoBlock.ClBlock.NORMAL)
                # Undo
-               if event.key == pg.K_z and event.mod & pg.KMOD_CTRL:
+               if event.key == pg.K_z and event.mod & pg.KMOD_CTRL and not event.mod & pg.KMOD_SHIFT:
                   self.undoStack.Undo ()
+
+               # back to the saved state / to the start of the trial in one step
+               if event.key == pg.K_z and event.mod & pg.KMOD_CTRL and event.mod & pg.KMOD_SHIFT:
+                  self.undoStack.RestoreCheckpoint (self.CHECKPOINT_SAVED)
+               if event.key == pg.K_t and event.mod & pg.KMOD_CTRL and event.mod & pg.KMOD_SHIFT:
+                  self.undoStack.RestoreCheckpoint (self.CHECKPOINT_TRIAL)
                   
                # Redo
                if event.key == pg.K_y and event.mod & pg.KMOD_CTRL:
@@ -937,16 +1081,11 @@ class NonogramGame:
             # At the moment only necessary to hide ino text when button was clicked (left or right)
             #CheckButtonClickedLeftOrRight (event)
 
-         #self.screen.fill((255, 255, 255))
-         self.screen.blit(self.screenBkg, (0, 0))
-         self.DrawNonogram ()
-         self.MarkProcessedBlocks ()
-         self.groupButtons.update ()
-         #self.groupButtons.clear (self.screen, clear_callback)
-         self.groupButtons.draw (self.screen)
-         self.ShowButtonInfoText ()
+         self.ProcessSolveWorker ()
+         self.CheckCompletion ()
          self.checkButtonEnable ()
-         pg.display.flip()
+         # only the changed regions are drawn
+         self.UpdateScreen (inputHandled)
 
       return exitCode
 
@@ -979,14 +1118,16 @@ class NonogramGame:
 
       if filePath:
          if os.path.exists (filePath): 
-            success, rB, cB, pF =  self.ReadNonogramFromFile(filePath)
+            # the text and the binary format are detected by NonoFile
+            success, rB, cB, board =  NonoFile.ReadNonogram (filePath)
             if not success:
                QtDialogs.MessageBox (*self.localMsgText ['NoValidNonoFile'])
                self.isNewNonogram = False
             else:
                self.rowBlocks = rB
                self.colBlocks = cB
-               self.processedFields = pF
+               self.board = board
+               self.saveBinary = NonoFile.IsBinaryNonogramFile (filePath)
                self.currentFilePath = filePath
                # we entered a valid nonogram file, which will be stored into the recent file list
                if self.isNewNonogram: recentFileList = self.propertyDict ['RecentNewFiles']
@@ -1020,7 +1161,6 @@ class NonogramGame:
             self.InitGameParameter ()
 
             self.SetGameMode (NonoBlock.ClBlock.NORMAL)
-            self.CheckForInvalidPositons ()
 
             self.DrawNonogramBackground ()
             self.HasTrialBlocks ()
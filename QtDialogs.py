@@ -19,11 +19,13 @@ def GetOpenNewFileName (startDir = ''):
 
    return str(pathlib.Path(filename[0]))  # convert to os independent path string
 
-def GetSaveFileName (startDir = ''):
-   filter = 'Nonogramm (*.nos);;Alle Dateien (*.*)'
-   filename = QFileDialog.getSaveFileName (None, 'Nonogramm speichern', '', filter, startDir)
+def GetSaveFileName (startDir = '', binary = False):
+   # returns the file name and True, if the binary format was selected
+   textFilter, binaryFilter = 'Nonogramm (*.nos)', 'Nonogramm binär (*.nos)'
+   filter = f'{textFilter};;{binaryFilter};;Alle Dateien (*.*)'
+   filename = QFileDialog.getSaveFileName (None, 'Nonogramm speichern', startDir, filter, binaryFilter if binary else textFilter)
    
-   return str(pathlib.Path(filename[0]))  # convert to os independent path string
+   return str(pathlib.Path(filename[0])), filename[1] == binaryFilter  # convert to os independent path string
 
 def MessageBox (txt, infoTxt='', buttons = QMessageBox.Ok, defaultButton = QMessageBox.Ok):
    msgBox = QMessageBox ()
@@ -1,51 +1,160 @@
 from collections import deque, namedtuple
 from enum import Enum
 
+import numpy as np
+
 EnUndoAction = Enum ('EnUndoAction', 'SINGLE RED2BW CHRMARK AUTOFILLOBV')
 
 class clUndo ():
-   Entry = namedtuple ('Entry', 'action data dataStruct')
-   UndoData = namedtuple ('UndoData', 'pos oldState')
+   """Undo / redo stack of the game.
+
+   The changes of board fields (actions SINGLE, RED2BW and AUTOFILLOBV) are stored as packed deltas: the flat field
+   indices (row * noCols + col) as int32 array and the old state and mode codes of NonoBoard.clNonoBoard packed into
+   one uint8 array (stateCode | modeCode << 2). CHRMARK stores the old state and mode of a clue block (NonoBlock.ClBlock).
+
+   Between BeginTransaction and EndTransaction all appended field changes of the same action are merged into one entry,
+   so a solver run is undone at once. The memory used by the history is estimated by MemoryUsage. If it exceeds
+   maxMemory, the oldest entries are dropped.
+
+   A checkpoint is a named position of the history (see Position). RestoreCheckpoint undoes or redoes all entries up to
+   the checkpoint at once: the board and the clue blocks are changed only once with the aggregated changes.
+   A new change drops the redo entries and the checkpoints beyond the current position, they cannot be reached any more.
+   """
+   Entry = namedtuple ('Entry', 'action data dataStruct size')
+   FieldDelta = namedtuple ('FieldDelta', 'indices codes')
+   ENTRY_OVERHEAD = 200       #: estimated bytes of an entry without the arrays of the deltas
+   DEFAULT_MAX_MEMORY = 64 * 2**20
+   FIELD_ACTIONS = (EnUndoAction.SINGLE, EnUndoAction.RED2BW, EnUndoAction.AUTOFILLOBV)
 
-   def __init__(self) -> None:
+   def __init__(self, maxMemory: int = DEFAULT_MAX_MEMORY) -> None:
       self.undo = deque ()
       self.redo = deque ()
+      self.maxMemory = maxMemory  #: the oldest entries are dropped, if the history uses more bytes. The newest entry is kept
+      self.noEvicted = 0          #: number of undo entries dropped because of maxMemory
+      self._memory = 0            #: estimated bytes used by all entries of undo and redo
+      self._inTransaction = False
+      self._transactionEntry = None  #: the entry of the current transaction, if already appended
+      self._transactionParts = []    #: the deltas of the transaction entry, merged by _FlushTransaction
+      self.checkpoints = {}          #: {name: position} see SetCheckpoint
+
+   #  packed deltas  ##############################################################
+   @staticmethod
+   def _PackFields (board, cols, rows, stateCodes, modeCodes):
+      indices = (np.asarray (rows, dtype=np.int32) * board.noCols + np.asarray (cols, dtype=np.int32))
+      codes = np.asarray (stateCodes, dtype=np.uint8) | (np.asarray (modeCodes, dtype=np.uint8) << 2)
+      return clUndo.FieldDelta (indices, codes)
+
+   @staticmethod
+   def _CurrentFields (board, indices):
+      """Returns the delta with the current codes of the fields"""
+      rows, cols = np.divmod (indices, board.noCols)
+      return clUndo._PackFields (board, cols, rows, *board.GetCodes (cols, rows))
+
+   @staticmethod
+   def _ApplyFields (board, delta):
+      rows, cols = np.divmod (delta.indices, board.noCols)
+      board.SetCodes (cols, rows, delta.codes & 3, delta.codes >> 2)
+
+   @staticmethod
+   def _MergeFields (deltas):
+      """Returns the delta which undoes all deltas (oldest first): for each field the code from before the oldest change"""
+      indices = np.concatenate ([delta.indices for delta in deltas])
+      codes = np.concatenate ([delta.codes for delta in deltas])
+      # np.unique returns the first occurrence, that is the one of the oldest delta
+      indices, first = np.unique (indices, return_index=True)
+      return clUndo.FieldDelta (indices, codes [first])
 
+   def _NewEntry (self, action, data, dataStruct):
+      size = self.ENTRY_OVERHEAD
+      if isinstance (data, self.FieldDelta): size += data.indices.nbytes + data.codes.nbytes
+      return self.Entry (action, data, dataStruct, size)
 
+   #  memory  #####################################################################
+   def MemoryUsage (self):
+      """Returns the estimated number of bytes used by the undo and redo entries"""
+      return self._memory
+
+   def _Push (self, stack, entry):
+      stack.append (entry)
+      self._memory += entry.size
+
+   def _Pop (self, stack, fromLeft = False):
+      entry = stack.popleft () if fromLeft else stack.pop ()
+      self._memory -= entry.size
+      return entry
+
+   def _Evict (self):
+      # first the oldest undo entries, then the redo entries which would be redone last. The newest undo entry is kept
+      while self._memory > self.maxMemory and len (self.undo) > 1:
+         self._Pop (self.undo, True)
+         self.noEvicted += 1
+      while self._memory > self.maxMemory and self.redo:
+         self._Pop (self.redo, True)
+
+   #  history  ####################################################################
    def Append (self, action, data, dataStruct):
-      self.undo.append (self.Entry (action, data, dataStruct))
+      """Appends a change.
+
+      Args:
+         action (EnUndoAction): The kind of the change.
+         data: SINGLE: [pos, oldState, oldMode] of the field. RED2BW, AUTOFILLOBV: the arrays (cols, rows, oldStateCodes,
+               oldModeCodes) of the changed fields. CHRMARK: [oldState, oldMode] of the clue block.
+         dataStruct: The NonoBoard.clNonoBoard for field changes, the NonoBlock.ClBlock for CHRMARK.
+      """
+      if action == EnUndoAction.SINGLE:
+         (col, row), state, mode = data
+         data = self._PackFields (dataStruct, [col], [row], [dataStruct.STATE_CODE [state]], [dataStruct.MODE_CODE [mode]])
+      elif action in self.FIELD_ACTIONS:
+         data = self._PackFields (dataStruct, *data)
+
+      last = self._transactionEntry
+      if last is not None and last.action == action and last.dataStruct is dataStruct and self.undo and last is self.undo [-1]:
+         # part of the entry of the transaction. The parts are merged once by _FlushTransaction
+         self._transactionParts.append (data)
+         grow = data.indices.nbytes + data.codes.nbytes
+         self._memory += grow
+         self._transactionEntry = self.undo [-1] = last._replace (size = last.size + grow)
+      else:
+         self._FlushTransaction ()
+         self._DropRedo ()
+         entry = self._NewEntry (action, data, dataStruct)
+         self._Push (self.undo, entry)
+         if self._inTransaction and action in self.FIELD_ACTIONS: 
+            self._transactionEntry = entry
+            self._transactionParts = [data]
+      self._Evict ()
 
+   def _FlushTransaction (self):
+      last, parts = self._transactionEntry, self._transactionParts
+      self._transactionEntry, self._transactionParts = None, []
+      if len (parts) < 2 or not self.undo or last is not self.undo [-1]: return
+      self._Pop (self.undo)
+      self._Push (self.undo, self._NewEntry (last.action, self._MergeFields (parts), last.dataStruct))
+
+   def _DropRedo (self):
+      while self.redo: self._Pop (self.redo)
+      position = self.Position ()
+      self.checkpoints = {name: pos for name, pos in self.checkpoints.items () if pos <= position}
+
+   def BeginTransaction (self):
+      """All field changes appended until EndTransaction, are merged into one entry per action"""
+      self._FlushTransaction ()
+      self._inTransaction = True
+
+   def EndTransaction (self):
+      self._FlushTransaction ()
+      self._inTransaction = False
 
    def _un_redo (self, fromStack, toStack):
-      action, data, dataStruct = fromStack.pop ()
-      if action == EnUndoAction.SINGLE:
-         pos, state, mode = data
-         s, m = (list (dataStruct [pos].values()))[1:]
-         toStack.append (self.Entry (action, [pos, s, m], dataStruct))
-         (dataStruct [pos])['state'] = state
-         (dataStruct [pos])['mode'] = mode
-
-      elif action == EnUndoAction.RED2BW:
-         redoData = []
-         for pos, state, mode in data:
-            s, m = (list (dataStruct [pos].values()))[1:]
-            redoData.append ([pos, s, m])
-            (dataStruct [pos])['state'] = state
-            (dataStruct [pos])['mode'] = mode
-         toStack.append (self.Entry (action, redoData, dataStruct))
-            
-      elif action == EnUndoAction.AUTOFILLOBV:
-         redoData = []
-         for pos, state, mode in data:
-            s, m = (list (dataStruct [pos].values()))[1:]
-            redoData.append ([pos, s, m])
-            (dataStruct [pos])['state'] = state
-            (dataStruct [pos])['mode'] = mode
-         toStack.append (self.Entry (action, redoData, dataStruct))
-            
+      action, data, dataStruct, _ = self._Pop (fromStack)
+      if action in self.FIELD_ACTIONS:
+         # dataStruct is the NonoBoard.clNonoBoard, data the FieldDelta with the codes to set
+         self._Push (toStack, self._NewEntry (action, self._CurrentFields (dataStruct, data.indices), dataStruct))
+         self._ApplyFields (dataStruct, data)
+
       elif action == EnUndoAction.CHRMARK:
          state, mode = data
-         toStack.append (self.Entry (action, [dataStruct.state, dataStruct.mode], dataStruct))
+         self._Push (toStack, self._NewEntry (action, [dataStruct.state, dataStruct.mode], dataStruct))
          dataStruct.state = state
          dataStruct.mode = mode
 
@@ -57,14 +166,79 @@ class clUndo ():
 
    def Undo (self):
       if len (self.undo) == 0: return False
-      return (self._un_redo (self.undo, self.redo))   
-      
+      self.EndTransaction ()
+      return (self._un_redo (self.undo, self.redo))
+
    def Redo (self):
       if len (self.redo) == 0: return False
+      self.EndTransaction ()
       return (self._un_redo (self.redo, self.undo))
 
    def CanUndo (self):
-      return len (self.undo)   
-      
+      return len (self.undo)
+
    def CanRedo (self):
-      return len (self.redo)
\ No newline at end of file
+      return len (self.redo)
+
+   def Position (self):
+      """Returns the number of changes done since the creation of the stack, less the undone ones. In contrast to
+      CanUndo, it is not changed by dropping the oldest entries, so it identifies a state of the history
+      """
+      return self.noEvicted + len (self.undo)
+
+   #  checkpoints  ################################################################
+   def SetCheckpoint (self, name: str):
+      """Marks the current position of the history with the name. An existing checkpoint of the name is replaced"""
+      self.EndTransaction ()
+      self.checkpoints [name] = self.Position ()
+
+   def IsAtCheckpoint (self, name: str):
+      return self.checkpoints.get (name) == self.Position ()
+
+   def CanRestoreCheckpoint (self, name: str):
+      """Returns True, if the checkpoint exists, is not the current position and its entries were not dropped"""
+      position = self.checkpoints.get (name)
+      if position is None or position == self.Position (): return False
+      return self.noEvicted <= position <= self.Position () + len (self.redo)
+
+   def RestoreCheckpoint (self, name: str):
+      """Undoes or redoes all entries up to the checkpoint in one step. Returns False, if not possible"""
+      if not self.CanRestoreCheckpoint (name): return False
+      self.EndTransaction ()
+      distance = self.checkpoints [name] - self.Position ()
+      if distance < 0: self._Jump (self.undo, self.redo, -distance)
+      else: self._Jump (self.redo, self.undo, distance)
+      return True
+
+   def _Jump (self, fromStack, toStack, count):
+      """Moves count entries from fromStack to toStack like count calls of _un_redo, but the boards and clue blocks 
+      are changed only once. The reverse delta of each entry is taken from a copy of the codes of the board, which 
+      is updated entry by entry, so the board itself is not touched in between.
+      """
+      codesOfBoards = {}  # {id (board): (board, codes of all fields, list of the index arrays)}
+      clueBlocks = {}     # {id (block): (block, [state, mode])}
+      for _ in range (count):
+         action, data, dataStruct, _ = self._Pop (fromStack)
+         if action in self.FIELD_ACTIONS:
+            board = dataStruct
+            if id (board) not in codesOfBoards:
+               codesOfBoards [id (board)] = (board, (board.state | board.mode << 2).ravel (), [])
+            _, codes, changed = codesOfBoards [id (board)]
+            self._Push (toStack, self._NewEntry (action, self.FieldDelta (data.indices, codes [data.indices]), board))
+            codes [data.indices] = data.codes
+            changed.append (data.indices)
+         elif action == EnUndoAction.CHRMARK:
+            block = dataStruct
+            _, current = clueBlocks.get (id (block), (block, [block.state, block.mode]))
+            self._Push (toStack, self._NewEntry (action, current, block))
+            clueBlocks [id (block)] = (block, list (data))
+         else:
+            print (f'Fehler: Unbekannter Action Typ bei Undo: action = {action}')
+
+      # the aggregated changes
+      for board, codes, changed in codesOfBoards.values ():
+         indices = np.unique (np.concatenate (changed))
+         self._ApplyFields (board, self.FieldDelta (indices, codes [indices]))
+      for block, (state, mode) in clueBlocks.values ():
+         block.state = state
+         block.mode = mode
@@ -1,4 +1,5 @@
 import pygame as pg
+from pgFontCache import fontCache
 
 class clButton (pg.sprite.Sprite):
   def __init__(self, screen, imageEnabled, imageDisabled, pos, infoText, enabled = True, changeImageWithEnable = True):
@@ -12,6 +13,7 @@ class clButton (pg.sprite.Sprite):
     self.hovered = False
     self.hoverStart = 0
     self.wasClicked = False  # is true as long hovered is true after a mouse click (left or right)
+    self._infoRect = None    # the rect of the info text, calculated with the first call of InfoTextRect
     self.image = self.image_e if enabled else self.image_d
     self.rect = self.image.get_rect()
     self.rect.topleft = pos
@@ -21,6 +23,11 @@ class clButton (pg.sprite.Sprite):
     if self.changeImageWithEnable:
       self.image = self.image_e if self.enabled else self.image_d 
 
+  def SetInfoText(self, infoText):
+    if infoText == self.infoText: return
+    self.infoText = infoText
+    self._infoRect = None  # the size of the info text has changed
+
   def SetEnabledImage(self, setEnabled):
     self.image = self.image_e if setEnabled else self.image_d 
 
@@ -36,22 +43,41 @@ class clButton (pg.sprite.Sprite):
     self.hovered = hit
     if not hit: self.wasClicked = False
 
+  def IsInfoTextVisible (self):
+    return self.hovered and self.enabled and  (pg.time.get_ticks() - self.hoverStart) > 500 and not self.wasClicked
+
+  def _RenderInfoText (self):
+    txtSurface = fontCache.Render('microsoft sans serif', 16, self.infoText, True, (0,0,0), pg.Color("white"))
+    borderRect = txtSurface.get_rect().inflate (10,10)
+    borderRect.topleft = self.rect.midbottom
+    return txtSurface, borderRect
+
+  def InfoTextRect (self):
+    # the screen area covered by the info text, None if not visible
+    if not self.IsInfoTextVisible (): return None
+    if self._infoRect is None: self._infoRect = self._RenderInfoText () [1]
+    return self._infoRect
+
   def DrawInfoText (self):
-    if self.hovered and self.enabled and  (pg.time.get_ticks() - self.hoverStart) > 500 and not self.wasClicked: 
+    if self.IsInfoTextVisible (): 
     #if self.hovered and self.enabled and  (pg.time.get_ticks() - self.hoverStart) > 500 and (pg.time.get_ticks() - self.hoverStart) < 1000: 
-      txtSurface = pg.font.SysFont('microsoft sans serif', 16).render(self.infoText, True, (0,0,0), pg.Color("white"))
+      txtSurface, borderRect = self._RenderInfoText ()
       txtRect = txtSurface.get_rect()
-      borderRect = txtSurface.get_rect().inflate (10,10)
-      borderRect.topleft = self.rect.midbottom
       #borderRect.move (txtRect.width//2, 0)
       self.screen.fill (pg.Color("white"), borderRect)
       txtRect.center = borderRect.center
       self.screen.blit(txtSurface, txtRect)
       pg.draw.rect(self.screen, pg.Color("black"), borderRect, width=2)
 
+  def HighlightRect (self):
+    return self.rect.inflate(4,4)
+
+  def DrawHighlight (self):
+    if self.hovered and self.enabled: 
+      self.screen.fill (pg.Color ('cadetblue2'), self.HighlightRect ())
+
   def update (self):
     self.check_hover ()
-    if self.hovered and self.enabled: 
-      self.screen.fill (pg.Color ('cadetblue2'), self.rect.inflate(4,4))
+    self.DrawHighlight ()
 
 
@@ -0,0 +1,66 @@
+import pygame as pg
+
+
+#################################################################################
+# definition of class clFontCache  #ff00ff
+#################################################################################
+class clFontCache:
+   """Cache of pygame fonts and rendered texts.
+
+   pg.font.SysFont looks up the system fonts and constructs a new font with each call, which is slow. The fonts are
+   created once per (name, size), the rendered texts once per (name, size, text, antialias, color, background).
+   The text sizes and the largest font size fitting into a given width are cached as well, so the layout of the
+   clue numbers does not render anything.
+   """
+
+   def __init__(self):
+      self._fonts = {}
+      self._surfaces = {}
+      self._sizes = {}
+      self._fittingSizes = {}
+
+   def GetFont (self, name: str, size: int):
+      font = self._fonts.get ((name, size))
+      if font is None:
+         font = self._fonts [(name, size)] = pg.font.SysFont (name, size)
+      return font
+
+   def Render (self, name: str, size: int, text: str, antialias = False, color = 'black', background = None, *, cache = True):
+      """Returns the rendered text. The returned surface is shared, it must not be changed.
+      Texts which change steadily (e.g. a progress count) should be rendered with cache=False, so the cache does not grow
+      """
+      if not cache: return self.GetFont (name, size).render (text, antialias, color, background)
+      key = (name, size, text, antialias, tuple (pg.Color (color)), None if background is None else tuple (pg.Color (background)))
+      surface = self._surfaces.get (key)
+      if surface is None:
+         surface = self._surfaces [key] = self.GetFont (name, size).render (text, antialias, color, background)
+      return surface
+
+   def Size (self, name: str, size: int, text: str):
+      """Returns the size (width, height) of the rendered text without rendering it"""
+      textSize = self._sizes.get ((name, size, text))
+      if textSize is None:
+         textSize = self._sizes [(name, size, text)] = self.GetFont (name, size).size (text)
+      return textSize
+
+   def FittingSize (self, name: str, maxSize: int, text: str, maxWidth: int):
+      """Returns the largest font size <= maxSize, for which the width of the text is less than maxWidth. At least 1"""
+      key = (name, maxSize, text, maxWidth)
+      size = self._fittingSizes.get (key)
+      if size is None:
+         size = maxSize
+         while size > 1 and self.Size (name, size, text) [0] >= maxWidth:
+            size -= 1
+         self._fittingSizes [key] = size
+      return size
+
+   def Clear (self):
+      self._fonts.clear ()
+      self._surfaces.clear ()
+      self._sizes.clear ()
+      self._fittingSizes.clear ()
+#################################################################################
+# end of class clFontCache
+#################################################################################
+
+fontCache = clFontCache ()  #: The font cache shared by all modules of the game
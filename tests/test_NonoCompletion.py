@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from NonoBoard import clNonoBoard
+from NonoCompletion import PlacedBlocks
+
+
+def Line (text):
+   """Returns the state codes of a line given as text: F filled, X cross, . unknown"""
+   codes = {'F': clNonoBoard.FILLED, 'X': clNonoBoard.CROSS, '.': clNonoBoard.UNKNOWN}
+   return np.array ([codes [c] for c in text], dtype=np.uint8)
+
+
+@pytest.mark.parametrize ('text, lengths, placed', [
+   ('FFX.......', (2, 1, 1), [True, False, False]),   # reached from the left edge
+   ('.......XFF', (1, 1, 2), [False, False, True]),   # reached from the right edge
+   ('FFXFXF....', (2, 1, 1), [True, True, True]),     # the runs form the clue
+   ('FFF.......', (3, 1), [False, False]),            # the run is not bounded by a cross
+])
+def test_placed_from_edges (text, lengths, placed):
+   assert PlacedBlocks (Line (text), lengths) == placed
+
+
+@pytest.mark.parametrize ('text, lengths, placed', [
+   ('..XFFFX...',   (1, 3, 1), [False, True, False]),   # only the block of length 3 fits the run
+   ('...XFFX...',   (2, 2), [False, False]),            # both blocks can cover the run
+   ('...XFX......', (1, 1, 3), [False, False, False]),  # the first or the second block
+   ('...XFX....',   (1, 1, 3), [False, True, False]),   # the blocks 1 and 3 do not fit right of the run
+   ('..XFFFX...',   (1, 1), [False, False]),            # no valid permutation
+])
+def test_placed_interior_segment (text, lengths, placed):
+   assert PlacedBlocks (Line (text), lengths) == placed
@@ -0,0 +1,31 @@
+import locale
+
+import pytest
+
+import NonoBatchSolve
+import NonoFile
+
+
+# open () reads the text files with the encoding of the locale
+needsUtf8 = pytest.mark.skipif (locale.getpreferredencoding (False).lower ().replace ('-', '') != 'utf8',
+                                reason='the encoding of the locale is not UTF-8')
+
+
+@pytest.fixture
+def NotUtf8File (tmp_path):
+   fileName = tmp_path / 'invalid.nob'
+   fileName.write_bytes (b'Z 1\nS \xff\xfe 1\n')
+   return str (fileName)
+
+
+@needsUtf8
+def test_not_utf8_file_raises_file_error (NotUtf8File):
+   with pytest.raises (NonoFile.clNonoFileError, match='invalid.nob'):
+      NonoFile.ParseNonogramFile (NotUtf8File)
+   assert NonoFile.ReadNonogram (NotUtf8File) == (False, None, None, None)
+
+
+@needsUtf8
+def test_batch_solver_reports_not_utf8_file (NotUtf8File):
+   result = NonoBatchSolve.SolvePuzzle (NotUtf8File)
+   assert result ['status'] == 'error' and 'invalid.nob' in result ['error']
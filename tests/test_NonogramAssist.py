@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+import NonogramAssist
+from NonogramAssist import NonoAssist, EnLineSolver
+from NonoBlock import ClBlock
+
+
+def RandomNonogram (noRows, noCols, density, seed):
+   """Returns (rowBlocks, colBlocks) of a random image without empty lines"""
+   rnd = random.Random (seed)
+   while True:
+      image = [[rnd.random () < density for _ in range (noCols)] for _ in range (noRows)]
+      lines = image + [list (col) for col in zip (*image)]
+      if all (any (line) for line in lines): break
+
+   def Blocks (line):
+      lengths, run = [], 0
+      for filled in line + [False]:
+         if filled: run += 1
+         elif run: lengths.append (run); run = 0
+      return [ClBlock (length) for length in lengths]
+   return [Blocks (line) for line in image], [Blocks (list (col)) for col in zip (*image)]
+
+
+def Solve (rowBlocks, colBlocks, lineSolver, useProbing = True):
+   assist = NonoAssist (rowBlocks, colBlocks, lineSolver=lineSolver, useProbing=useProbing)
+   for _, solvedFields in assist.NonogramSolver (): pass
+   return dict (solvedFields)
+
+
+@pytest.mark.parametrize ('lineSolver', [EnLineSolver.STEPPER, EnLineSolver.BITSTEPPER])
+def test_probing_with_stepper_equals_dp (lineSolver):
+   # the probes run on copies of the board, but share the steppers with the real solve
+   for seed in range (40):
+      rowBlocks, colBlocks = RandomNonogram (8, 8, 0.55, seed)
+      assert Solve (rowBlocks, colBlocks, lineSolver) == Solve (rowBlocks, colBlocks, EnLineSolver.DP), f'seed {seed}'
+
+
+def Solutions (rowBlocks, colBlocks, lineSolver):
+   assist = NonoAssist (rowBlocks, colBlocks, lineSolver=lineSolver)
+   return sorted (sorted (solution.items ()) for solution in assist.EnumerateSolutions (100))
+
+
+@pytest.mark.parametrize ('lineSolver', [EnLineSolver.STEPPER, EnLineSolver.BITSTEPPER])
+def test_enumerate_solutions_with_stepper_equals_dp (lineSolver):
+   # the branches of the search are solved on copies of the board with the same steppers
+   for seed in range (40):
+      rowBlocks, colBlocks = RandomNonogram (6, 6, 0.5, seed)
+      assert Solutions (rowBlocks, colBlocks, lineSolver) == Solutions (rowBlocks, colBlocks, EnLineSolver.DP), f'seed {seed}'
+
+
+def test_verify_unique ():
+   # a single filled field has one solution, the diagonal of 2x2 fields has two
+   assert NonogramAssist.verify_unique ([[ClBlock (1)], [ClBlock (0)]], [[ClBlock (1)], [ClBlock (0)]])
+   assert not NonogramAssist.verify_unique ([[ClBlock (1)], [ClBlock (1)]], [[ClBlock (1)], [ClBlock (1)]])
+
+
+@pytest.mark.parametrize ('lineSolver', list (EnLineSolver))
+def test_empty_lines (lineSolver):
+   # the first row and the last column are empty (block length 0)
+   rowBlocks = [[ClBlock (0)], [ClBlock (2)], [ClBlock (1)]]
+   colBlocks = [[ClBlock (1)], [ClBlock (2)], [ClBlock (0)]]
+   solvedFields = Solve (rowBlocks, colBlocks, lineSolver)
+   assert len (solvedFields) == 9
+   assert sorted (pos for pos, state in solvedFields.items () if state == ClBlock.FILLED) == [(0, 1), (1, 1), (1, 2)]
+
+
+@pytest.mark.parametrize ('lineSolver, noWorkers', [*((s, 0) for s in EnLineSolver), (EnLineSolver.DP, 2)])
+def test_contradiction (lineSolver, noWorkers):
+   # the row blocks need a filled field in column 1, whose clue is 0
+   assist = NonoAssist ([[ClBlock (2)], [ClBlock (1)], [ClBlock (0)]], [[ClBlock (1)], [ClBlock (0)], [ClBlock (0)]],
+                        lineSolver=lineSolver, noWorkers=noWorkers)
+   events = []
+   assist.instrument.AddSink (lambda event, data: events.append ((event, data)))
+   isSolved, _ = list (assist.NonogramSolver ()) [-1]
+   assist.Close ()
+   assert not isSolved and assist.isContradictory
+   assert events [-1][0] == 'solve' and events [-1][1]['contradiction'] and not events [-1][1]['solved']
+
+
+@pytest.mark.parametrize ('lineSolver', list (EnLineSolver))
+def test_contradiction_found_by_probing (lineSolver):
+   # line solving alone gets stuck without a contradiction, the probes find that there is no solution
+   rowBlocks = [[ClBlock (2)], [ClBlock (1), ClBlock (1)], [ClBlock (1)], [ClBlock (2)]]
+   colBlocks = [[ClBlock (1)], [ClBlock (1), ClBlock (1)], [ClBlock (2)], [ClBlock (2)]]
+   for useProbing in (False, True):
+      assist = NonoAssist (rowBlocks, colBlocks, lineSolver=lineSolver, useProbing=useProbing)
+      isSolved, _ = list (assist.NonogramSolver ()) [-1]
+      assert not isSolved and assist.isContradictory == useProbing
+
+
+@pytest.mark.parametrize ('lineSolver', [EnLineSolver.STEPPER, EnLineSolver.BITSTEPPER])
+def test_number_permutations (lineSolver):
+   # the closed form of the steppers equals the exact count, also for empty lines
+   rowBlocks = [[ClBlock (1)], [ClBlock (0)], [ClBlock (2)], [ClBlock (1), ClBlock (1)], [ClBlock (3)]]
+   colBlocks = [[ClBlock (1)], [ClBlock (1)], [ClBlock (1)]]
+   assist = NonoAssist (rowBlocks, colBlocks, lineSolver=lineSolver)
+   for stepper in assist.stepperRows + assist.stepperCols:
+      assert stepper.numberPermutations == NonogramAssist.NonoLineSolver.CountLinePermutations (stepper.blockLengths, stepper.noFields)
+   # the exact and the logarithmic count agree
+   assert assist.CalculateNumberPermutationsOfNonogram () == 3 * 1 * 2 * 1 * 1
+   assert 2 ** assist.CalculateNumberPermutationsOfNonogram (logScale=True) == pytest.approx (6)
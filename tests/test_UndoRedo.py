@@ -0,0 +1,53 @@
+import numpy as np
+
+import NonoBoard
+import UndoRedo
+from NonoBlock import ClBlock
+from UndoRedo import EnUndoAction
+
+
+def Edit (undoStack, board, pos, state):
+   # the same as a click of the game: the old state of the field is appended, then the field is set
+   undoStack.Append (EnUndoAction.SINGLE, [pos, *board.Get (pos)], board)
+   board.Set (pos, state, ClBlock.NORMAL)
+
+
+def test_restore_checkpoint_after_undo_and_new_edit ():
+   board = NonoBoard.clNonoBoard (3, 3)
+   undoStack = UndoRedo.clUndo ()
+   Edit (undoStack, board, (0, 0), ClBlock.FILLED)
+   Edit (undoStack, board, (1, 0), ClBlock.FILLED)
+   undoStack.SetCheckpoint ('saved')
+   saved = board.state.copy ()
+   undoStack.Undo ()
+   undoStack.Undo ()
+   Edit (undoStack, board, (2, 2), ClBlock.CROSS)
+
+   # the saved state cannot be reached any more, the redo entries are dropped
+   assert not undoStack.CanRedo ()
+   assert not undoStack.RestoreCheckpoint ('saved')
+   assert not np.array_equal (board.state, saved)
+
+
+def test_checkpoint_is_not_reached_by_a_different_edit ():
+   board = NonoBoard.clNonoBoard (3, 3)
+   undoStack = UndoRedo.clUndo ()
+   Edit (undoStack, board, (0, 0), ClBlock.FILLED)
+   undoStack.SetCheckpoint ('saved')
+   undoStack.Undo ()
+   Edit (undoStack, board, (1, 1), ClBlock.FILLED)
+   assert not undoStack.IsAtCheckpoint ('saved')
+
+
+def test_checkpoint_before_the_new_edit_is_kept ():
+   board = NonoBoard.clNonoBoard (3, 3)
+   undoStack = UndoRedo.clUndo ()
+   Edit (undoStack, board, (0, 0), ClBlock.FILLED)
+   undoStack.SetCheckpoint ('saved')
+   saved = board.state.copy ()
+   Edit (undoStack, board, (1, 1), ClBlock.FILLED)
+   undoStack.Undo ()
+   Edit (undoStack, board, (2, 2), ClBlock.CROSS)
+   assert undoStack.RestoreCheckpoint ('saved')
+   assert np.array_equal (board.state, saved)
+   assert undoStack.IsAtCheckpoint ('saved')